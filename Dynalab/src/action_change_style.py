@@ -93,7 +93,7 @@ class ChangeStyle(dynalab.Ext):
 
         self.message(f"the style of {counter} objects was modified", verbosity=1)
         self.message(
-            _("{extension:s}: running time = {time:.0f}ms").format(extension=self.name, time=self.get_timer()),
+            _("{extension:s}: running time = {time:.0f}ms").format(extension=self.name, time=self.running_time()),
             verbosity=3,
         )
         self.message("", verbosity=1)
@@ -4,7 +4,18 @@ from gettext import gettext as _
 
 import inkex
 
-from lib import dynalab
+from lib import dynalab, spatial, utils
+
+
+def _first_point(path):
+    """return the first point of an absolute path, as a pair of coordinates"""
+    return path[0].x, path[0].y
+
+
+def _last_point(path):
+    """return the last point of an absolute path, as a pair of coordinates"""
+    *_, p = path.end_points
+    return p.x, p.y
 
 
 class CloseOpen(dynalab.Ext):
@@ -29,6 +40,13 @@ class CloseOpen(dynalab.Ext):
             help="restrict to paths with 'fill mode' color",
             dest="only_fill_mode_paths",
         )
+        pars.add_argument(
+            "--join-paths",
+            type=inkex.Boolean,
+            default=False,
+            help="join open subpaths of different paths into closed subpaths when their endpoints are close",
+            dest="join_paths",
+        )
 
     def effect(self):
         if not self.svg.selected:
@@ -41,6 +59,7 @@ class CloseOpen(dynalab.Ext):
         counter_subpaths_not_closed = 0
         d = self.mm_to_svg(self.options.close_distance)
         d2 = d * d
+        elements = []  # paths that were looked at
         for elem in self.selected_or_all(skip_groups=False):
 
             # skip non-path element
@@ -56,6 +75,12 @@ class CloseOpen(dynalab.Ext):
                 self.message("\t-", "path with id={elem.get_id()} uses path effects, SKIP", verbosity=1)
                 continue  # don't try closing them
 
+            # skip paths without open subpaths, without parsing them
+            subpaths, closed = utils.path_topology(elem.attrib.get("d", ""))
+            if subpaths == closed:
+                continue
+            elements.append(elem)
+
             path = elem.path.to_absolute()
             coord = [p.end_point for p in path.proxy_iterator()]
 
@@ -96,6 +121,13 @@ class CloseOpen(dynalab.Ext):
                 elem.path = new_path
                 counter_paths += 1
 
+        if self.options.join_paths:
+            counter_joined, counter_cycles = self.join_subpaths(elements, d)
+            counter_subpaths_not_closed -= counter_joined
+            self.message(
+                f"{counter_joined} open subpath(s) were joined into {counter_cycles} closed subpath(s)", verbosity=1
+            )
+
         self.message(
             f"{counter_subpaths_closed} subpath(s) were closed in {counter_paths} path(s)",
             "\n",
@@ -103,11 +135,109 @@ class CloseOpen(dynalab.Ext):
             verbosity=1,
         )
         self.message(
-            _("{extension:s}: running time = {time:.0f}ms").format(extension=self.name, time=self.get_timer()),
+            _("{extension:s}: running time = {time:.0f}ms").format(extension=self.name, time=self.running_time()),
             verbosity=3,
         )
         self.message("", verbosity=1)
 
+    def join_subpaths(self, elements, d):
+        """join open subpaths of different paths into closed subpaths
+        The endpoints of all the open subpaths are put in a spatial index, and
+        the pairs of endpoints closer than `d` are matched greedily, the
+        closest pairs first. The subpaths whose matched endpoints form a loop
+        are chained (reversing them when needed) into a single closed subpath,
+        which replaces them in the first of their paths. Paths that become
+        empty are removed. Subpaths whose endpoints cannot be matched, or
+        that would only form an open chain, are left alone.
+        Return the number of subpaths that were joined and the number of
+        closed subpaths created."""
+        # the open subpaths, in document coordinates
+        parts = {}  # subpaths of each element (in its coordinates), None for the joined ones
+        subpaths = []  # triples (element, index in parts[elem], subpath in document coordinates)
+        for elem in elements:
+            transform = self.composed_transform(elem)
+            parts[elem] = elem.path.to_absolute().break_apart()
+            for i, sub in enumerate(parts[elem]):
+                if not isinstance(sub[-1], inkex.paths.ZoneClose):
+                    subpaths.append((elem, i, sub.transform(transform)))
+
+        # endpoints 2k and 2k+1 are the start and the end of subpath k
+        endpoints = []
+        for _elem, _i, sub in subpaths:
+            endpoints.append(_first_point(sub))
+            endpoints.append(_last_point(sub))
+        index = spatial.SpatialIndex().build(
+            ((e, inkex.BoundingBox((x, x), (y, y))) for e, (x, y) in enumerate(endpoints)), cell_size=d or None
+        )
+        pairs = []  # (squared distance, endpoint, endpoint)
+        for e, (x, y) in enumerate(endpoints):
+            for f in index.query(inkex.BoundingBox((x - d, x + d), (y - d, y + d))):
+                if f <= e:
+                    continue
+                d2 = (x - endpoints[f][0]) ** 2 + (y - endpoints[f][1]) ** 2
+                if d2 <= d * d:
+                    pairs.append((d2, e, f))
+        pairs.sort()
+        match = {}  # matched endpoints
+        for _d2, e, f in pairs:
+            if e not in match and f not in match:
+                match[e] = f
+                match[f] = e
+
+        # follow the matches from each subpath to find the loops
+        visited = set()
+        counter_joined = counter_cycles = 0
+        for k in range(len(subpaths)):
+            if k in visited:
+                continue
+            cycle = []  # pairs (subpath, forward)
+            e = 2 * k  # endpoint through which the current subpath is entered
+            while e // 2 not in visited:
+                visited.add(e // 2)
+                cycle.append((e // 2, e % 2 == 0))
+                e = match.get(e ^ 1)
+                if e is None:
+                    break
+            if e != 2 * k:
+                continue  # open chain
+
+            welded = inkex.Path()
+            end = None  # last point of the welded subpath
+            for s, forward in cycle:
+                sub = subpaths[s][2] if forward else subpaths[s][2].reverse()
+                if welded:
+                    x, y = _first_point(sub)
+                    if (x, y) != end:
+                        welded.append(inkex.paths.Line(x, y))
+                    sub = sub[1:]
+                welded.extend(sub)
+                end = _last_point(subpaths[s][2]) if forward else _first_point(subpaths[s][2])
+            welded.append(inkex.paths.ZoneClose())
+
+            # the loop replaces its subpaths in the first path
+            for s, _forward in cycle:
+                elem, i, _sub = subpaths[s]
+                parts[elem][i] = None
+            target = subpaths[min(s for s, _forward in cycle)][0]
+            parts[target].append(welded.transform(-self.composed_transform(target)))
+            counter_joined += len(cycle)
+            counter_cycles += 1
+            ids = ", ".join(dict.fromkeys(subpaths[s][0].get_id() for s, _forward in cycle))
+            self.message(
+                "\t-", f"{len(cycle)} subpath(s) of path(s) {ids} joined into path {target.get_id()}", verbosity=2
+            )
+
+        for elem, subs in parts.items():
+            if all(sub is not None for sub in subs):
+                continue  # unchanged
+            subs = [sub for sub in subs if sub is not None]
+            if subs:
+                elem.path = inkex.Path([cmd for sub in subs for cmd in sub])
+            else:
+                self.message("\t-", f"path with id={elem.get_id()} was entirely joined, REMOVED", verbosity=2)
+                elem.getparent().remove(elem)
+        return counter_joined, counter_cycles
+
 
 if __name__ == "__main__":
     CloseOpen().run()
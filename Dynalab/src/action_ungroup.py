@@ -61,9 +61,13 @@ using the "Arrange" => "deep-ungroup" extension.)
                 self.message("\t-", f"ungroup group with id={gr.get_id()}", verbosity=2)
                 counter_groups += 1
 
+            # NOTE: deeper groups are removed first and their elements are
+            # moved to the root of the document, so that the composed
+            # transform of the group's ancestors don't change
+            transform = self.composed_transform(gr)
             for elem in gr:
                 gr.remove(elem)
-                elem.transform = gr.getparent().composed_transform() @ gr.transform @ elem.transform
+                elem.transform = transform @ elem.transform
                 self.svg.add(elem)
             gr.getparent().remove(gr)
 
@@ -80,7 +84,7 @@ using the "Arrange" => "deep-ungroup" extension.)
                 verbosity=1,
             )
         self.message(
-            _("{extension:s}: running time = {time:.0f}ms").format(extension=self.name, time=self.get_timer()),
+            _("{extension:s}: running time = {time:.0f}ms").format(extension=self.name, time=self.running_time()),
             verbosity=3,
         )
         self.message("", verbosity=1)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+
+"""
+run the diagnostics on a batch of SVG files from the command line
+
+usage: python batch.py [--jobs N] [--output-dir DIR] [--report FILE] [--stream] FILE_OR_DIR ... [EXTENSION OPTIONS]
+
+Directories are replaced by the SVG files they contain. Each file is
+diagnosed by the extension (as if it was run from inkscape) in a pool of
+processes. Options that are not recognized (for example "--tiny=false") are
+given to the extension.
+With --stream, the files are not loaded in memory but parsed on the fly, and
+only the diagnostics that look at one object at a time are run (see
+`Ext.stream_diagnostics`). This is meant for very large files.
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import multiprocessing.util
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from gettext import gettext as _
+from gettext import ngettext
+
+import inkex
+
+from lib import dynalab, shell
+
+# extensions that can be run in batch: name => (module, class)
+EXTENSIONS = {
+    "diagnostics": ("diagnostics", "Battery"),
+    "diagnostics_objects": ("diagnostics_objects", "Battery"),
+}
+
+LEVELS = {dynalab.NOTE: "notes", dynalab.WARNING: "warnings", dynalab.ERROR: "errors"}
+
+
+def _stop_shell():
+    """stop the inkscape shell of a worker process"""
+    if shell._shell is not None:
+        shell._shell.stop()
+
+
+def _init_worker():
+    """initialize a worker process
+    Worker processes don't run the atexit functions, so the inkscape shell
+    they use is stopped with a multiprocessing finalizer instead."""
+    multiprocessing.util.Finalize(None, _stop_shell, exitpriority=10)
+
+
+def _count_levels(levels):
+    """count the occurrences of each error level"""
+    counters = {name: 0 for name in LEVELS.values()}
+    for level in levels:
+        if level in LEVELS:
+            counters[LEVELS[level]] += 1
+    return counters
+
+
+def _artifact_levels(svg):
+    """count the artifacts of each error level in a document"""
+    layer = svg.getElementById(dynalab.ARTIFACT_LAYER_ID)
+    if layer is None:
+        return _count_levels([])
+    levels = []
+    for elem in layer.iter():
+        if elem.get("class") != dynalab.ARTIFACT_CLASS:
+            continue
+        level = inkex.Style(elem.attrib.get("style", "")).get("error-level")
+        if level is not None:
+            levels.append(int(level))
+    return _count_levels(levels)
+
+
+def _finding_levels(findings):
+    """count the findings of each error level of a streamed document
+    Like artifacts, the findings for the same element are counted once, with
+    the highest level."""
+    levels = {}
+    others = []  # findings that are not about an element
+    for level, id, _msg in findings:
+        if id is None:
+            others.append(level)
+        else:
+            levels[id] = max(level, levels.get(id, level))
+    return _count_levels(others + list(levels.values()))
+
+
+def diagnose(filename, extension, args, output_dir=None, stream=False):
+    """run an extension on a file and return a summary of the result
+    This is run in the worker processes. The annotated document is saved in
+    `output_dir` (if given) and the messages of the extension are captured.
+    If `stream` is true, the file is diagnosed while it is parsed, and no
+    annotated document is produced."""
+    module, cls = EXTENSIONS[extension]
+    ext = getattr(importlib.import_module(module), cls)()
+    output = os.path.join(output_dir, os.path.basename(filename)) if output_dir else os.devnull
+
+    messages = io.StringIO()
+    status = "ok"
+    start = time.perf_counter()
+    with contextlib.redirect_stderr(messages):
+        try:
+            if stream:
+                ext.options = ext.arg_parser.parse_args(args)
+                ext.stream_diagnostics(filename, ext.diagnostics())
+            else:
+                ext.run(args + [filename], output=output)
+        except SystemExit as e:
+            if e.code:
+                status = "aborted"
+        except Exception:
+            # a problem with a single file shouldn't stop the whole batch
+            traceback.print_exc()
+            status = "crashed"
+    run_time = 1000 * (time.perf_counter() - start)
+
+    result = {"file": filename, "status": status, "time": run_time}
+    if status == "ok":
+        if stream:
+            result.update(_finding_levels(ext.findings))
+        else:
+            result.update(_artifact_levels(ext.svg))
+        if output_dir:
+            result["output"] = output
+    result["messages"] = messages.getvalue()
+    return result
+
+
+def svg_files(paths):
+    """iterates over the given files, and the SVG files of the given directories"""
+    for path in paths:
+        if os.path.isdir(path):
+            for f in sorted(os.listdir(path)):
+                if f.lower().endswith(".svg"):
+                    yield os.path.join(path, f)
+        else:
+            yield path
+
+
+def summary(result):
+    """one line summary of the result for a file"""
+    if result["status"] != "ok":
+        return f"{result['file']}: {result['status']}"
+    details = ", ".join(
+        [
+            ngettext("{counter} error", "{counter} errors", result["errors"]).format(counter=result["errors"]),
+            ngettext("{counter} warning", "{counter} warnings", result["warnings"]).format(counter=result["warnings"]),
+            ngettext("{counter} note", "{counter} notes", result["notes"]).format(counter=result["notes"]),
+        ]
+    )
+    return f"{result['file']}: {details} ({result['time']:.0f}ms)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=_("run the diagnostics on a batch of SVG files"))
+    parser.add_argument("paths", nargs="+", metavar="FILE_OR_DIR", help=_("SVG files, or directories of SVG files"))
+    parser.add_argument(
+        "--extension", choices=EXTENSIONS, default="diagnostics", help=_("extension to run (default: diagnostics)")
+    )
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help=_("number of worker processes"))
+    parser.add_argument(
+        "--output-dir",
+        dest="output_dir",
+        help=_("directory where the annotated SVG files are saved (existing files are overwritten)"),
+    )
+    parser.add_argument("--report", help=_("JSON file for the detailed report (including messages)"))
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help=_("parse the files on the fly instead of loading them (for very large files, read-only)"),
+    )
+    opts, args = parser.parse_known_args()
+    if opts.stream and opts.output_dir:
+        parser.error(_("--output-dir cannot be used with --stream"))
+
+    files = list(svg_files(opts.paths))
+    if opts.output_dir:
+        os.makedirs(opts.output_dir, exist_ok=True)
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=opts.jobs, initializer=_init_worker) as pool:
+        futures = {pool.submit(diagnose, f, opts.extension, args, opts.output_dir, opts.stream): f for f in files}
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            print(summary(result), flush=True)
+
+    results = [results[f] for f in files]
+    if opts.report:
+        with open(opts.report, mode="wt") as f:
+            json.dump(results, f, indent=2)
+
+    failed = sum(1 for r in results if r["status"] != "ok")
+    print(ngettext("{counter} file diagnosed", "{counter} files diagnosed", len(files)).format(counter=len(files)))
+    if failed:
+        print(ngettext("{counter} failure", "{counter} failures", failed).format(counter=failed))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
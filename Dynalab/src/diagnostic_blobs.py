@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 
+import heapq
 from gettext import gettext as _
 from gettext import ngettext
 
@@ -7,31 +8,168 @@ import inkex
 
 from lib import dynalab
 from lib.dynalab import NOTE
-from lib.intervaltree import IntervalTree
+from lib.sortedcontainers import SortedList
+
+
+class UnionFind:
+    """disjoint sets over the integers 0, 1, ..., n-1"""
+
+    def __init__(self, n):
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def find(self, i):
+        """return the representative of the set containing i"""
+        parent = self.parent
+        while parent[i] != i:
+            # path halving
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, i, j):
+        """merge the sets containing i and j, and return true if they were different"""
+        i, j = self.find(i), self.find(j)
+        if i == j:
+            return False
+        if self.size[i] < self.size[j]:
+            i, j = j, i
+        self.parent[j] = i
+        self.size[i] += self.size[j]
+        return True
+
+
+def overlapping_pairs(boxes):
+    """iterates over the pairs of indices of overlapping boxes, given as
+    tuples (x0, y0, x1, y1)
+    This uses a sweep line going from left to right: the boxes are looked
+    at by increasing left side, and the "active" boxes (those that cross
+    the sweep line) are kept ordered by their top side, so that only the
+    active boxes with a close enough top side need to be looked at."""
+    order = sorted(range(len(boxes)), key=lambda i: boxes[i][0])
+    active = SortedList()  # pairs (y0, index) of active boxes
+    ending = []  # heap of (x1, y0, index) of active boxes
+    max_height = 0  # height of the tallest box seen so far
+    for i in order:
+        x0, y0, x1, y1 = boxes[i]
+        while ending and ending[0][0] < x0:
+            top, j = heapq.heappop(ending)[1:]
+            active.remove((top, j))
+        # the active boxes overlapping the current one have their top side
+        # between y0 - max_height and y1
+        for top, j in active.irange((y0 - max_height, -1), (y1, len(boxes))):
+            if boxes[j][3] >= y0:
+                yield j, i
+        active.add((y0, i))
+        heapq.heappush(ending, (x1, y0, i))
+        max_height = max(max_height, y1 - y0)
+
+
+def _merge_blobs(ids, blobs, boxes):
+    """merge the blobs (lists of indices in `ids`) whose bounding boxes
+    (tuples (x0, y0, x1, y1) in `boxes`) overlap, until no two of them
+    overlap
+    The connected components of overlapping boxes are computed with a union
+    find structure, and this is repeated on the bounding boxes of the
+    components. The result is a list of pairs (ids, bounding box)."""
+    while True:
+        components = UnionFind(len(boxes))
+        merged = False
+        for i, j in overlapping_pairs(boxes):
+            merged = components.union(i, j) or merged
+        if not merged:
+            break
+        groups = {}
+        for k in range(len(boxes)):
+            groups.setdefault(components.find(k), []).append(k)
+        blobs = [[i for k in group for i in blobs[k]] for group in groups.values()]
+        boxes = [
+            (
+                min(boxes[k][0] for k in group),
+                min(boxes[k][1] for k in group),
+                max(boxes[k][2] for k in group),
+                max(boxes[k][3] for k in group),
+            )
+            for group in groups.values()
+        ]
+    return [
+        ([ids[i] for i in sorted(blob)], inkex.BoundingBox((x0, x1), (y0, y1)))
+        for blob, (x0, y0, x1, y1) in zip(blobs, boxes)
+    ]
 
 
 def compute_blobs(BB):
-    tree = IntervalTree()
-    # Add each box to the interval tree by x-interval
-    for id, bb in BB:
-        simplified = False  # because bb can get bigger, we need to keep looking for boxes that intersect it
-        ids = [id]
-        while not simplified:
-            simplified = True
-            # Find all boxes whose x-interval overlaps the current x-interval
-            candidates = tree[bb.left : bb.right]
-            for itv in candidates:
-                ids2, bb2 = itv.data
-                if bb & bb2:
-                    simplified = False
-                    bb = bb + bb2
-                    ids.extend(ids2)
-                    tree.remove(itv)
-        tree.addi(bb.left, bb.right, (ids, bb))
-    return [itv.data for itv in tree]
-
-
-class MarkBlobs(dynalab.Ext):
+    """aggregate the boxes from the list of pairs (id, bounding box) into blobs
+    A box belongs to a blob if it overlaps a box of the blob, or the
+    bounding box of the blob. The result is a list of pairs (ids, bounding
+    box of the blob)."""
+    ids = [id for id, _ in BB]
+    boxes = [(bb.left, bb.top, bb.right, bb.bottom) for _, bb in BB]
+    return _merge_blobs(ids, [[i] for i in range(len(boxes))], boxes)
+
+
+def _gap(a, b):
+    """return the smallest padding for which the boxes (x0, y0, x1, y1) overlap"""
+    gx = max(a[0] - b[2], b[0] - a[2], 0)
+    gy = max(a[1] - b[3], b[1] - a[3], 0)
+    return max(gx, gy) / 2
+
+
+class BlobHierarchy:
+    """single linkage hierarchy of (non padded) boxes, used to compute the
+    blobs for several paddings
+    Two boxes are linked at padding p if they overlap once padded by p. The
+    links up to `max_padding` are found once with the spatial index of the
+    elements (see `Ext.element_index`), and only those that join different
+    components (ie the edges of a minimum spanning forest, as in Kruskal's
+    algorithm) are kept, sorted by padding. The components for any padding
+    are then obtained in linear time.
+    """
+
+    def __init__(self, index, max_padding):
+        self.ids = [elem.get_id() for elem in index.keys]
+        self.boxes = index.boxes
+        position = {elem: i for i, elem in enumerate(index.keys)}
+        # two boxes padded by p overlap when one of them, padded by 2p,
+        # overlaps the other
+        p = 2 * max_padding
+        links = []
+        for i, (x0, y0, x1, y1) in enumerate(self.boxes):
+            for elem in index.query(inkex.BoundingBox((x0 - p, x1 + p), (y0 - p, y1 + p))):
+                j = position[elem]
+                if j > i:
+                    links.append((_gap(self.boxes[i], self.boxes[j]), i, j))
+        links.sort()
+        components = UnionFind(len(self.boxes))
+        self.links = [(padding, i, j) for padding, i, j in links if components.union(i, j)]
+
+    def blobs(self, padding):
+        """return the blobs for a padding (at most `max_padding`), as a list
+        of pairs (ids, bounding box of the blob)
+        The result is the same as `compute_blobs` on the boxes padded by
+        `padding`: the components of linked boxes are merged when their
+        bounding boxes overlap (which is rare, and fast)."""
+        components = UnionFind(len(self.boxes))
+        for p, i, j in self.links:
+            if p > padding:
+                break
+            components.union(i, j)
+        groups = {}
+        for k in range(len(self.boxes)):
+            groups.setdefault(components.find(k), []).append(k)
+        boxes = [
+            (
+                min(self.boxes[k][0] for k in group) - padding,
+                min(self.boxes[k][1] for k in group) - padding,
+                max(self.boxes[k][2] for k in group) + padding,
+                max(self.boxes[k][3] for k in group) + padding,
+            )
+            for group in groups.values()
+        ]
+        return _merge_blobs(self.ids, list(groups.values()), boxes)
+
+
+class MarkBlobs(dynalab.Diagnostic):
     """
     aggregate bounding boxes into blobs and mark disconnected blobs
     """
@@ -40,22 +178,45 @@ class MarkBlobs(dynalab.Ext):
 
     def add_arguments(self, pars):
         pars.add_argument("--padding", type=float, default=10, help="padding added to boxes to check overlap (mm)")
+        pars.add_argument(
+            "--paddings", type=str, default="", help="comma separated list of other paddings to report (mm)"
+        )
 
-    def effect(self, clean=True):
-        self.message(self.name, verbosity=3)
-        self.init_artifact_layer()
-
-        BB = []
-        for elem in self.selected_or_all(skip_groups=True):
-            BB.append((elem.get_id(), self.bounding_box(elem)))
-
-        # add padding around bbs
-        padding = self.mm_to_svg(self.options.padding)
-        for i, (id, bb) in enumerate(BB):
-            x, y, w, h = bb.left, bb.top, bb.width, bb.height
-            BB[i] = id, inkex.BoundingBox.new_xywh(x - padding, y - padding, w + 2 * padding, h + 2 * padding)
-
-        BBB = compute_blobs(BB)
+    def init_diagnostic(self):
+        self.padding = self.mm_to_svg(self.options.padding)
+        try:
+            self.paddings = [float(p) for p in (self.options.paddings or "").split(",") if p.strip()]
+        except ValueError:
+            self.abort("", _("invalid list of paddings: {paddings}").format(paddings=self.options.paddings))
+
+    def finish_diagnostic(self):
+        # NOTE: the bounding boxes are looked at all at once, with the spatial
+        # index of the elements, which contains the non empty bounding boxes
+        # of all elements
+        index = self.element_index()
+        if self.paddings:
+            # the hierarchy is computed once for all the paddings
+            hierarchy = BlobHierarchy(index, max([self.padding] + [self.mm_to_svg(p) for p in self.paddings]))
+            for p in self.paddings:
+                counter = len(hierarchy.blobs(self.mm_to_svg(p)))
+                self.message(
+                    ngettext(
+                        "padding {padding}mm: {counter} bounding boxes blob",
+                        "padding {padding}mm: {counter} bounding boxes blobs",
+                        counter,
+                    ).format(padding=p, counter=counter),
+                    verbosity=1,
+                )
+            BBB = hierarchy.blobs(self.padding)
+        else:
+            # add padding around bbs
+            padding = self.padding
+            boxes = []
+            for elem, (x, y, x1, y1) in zip(index.keys, index.boxes):
+                w, h = x1 - x, y1 - y
+                bb = inkex.BoundingBox.new_xywh(x - padding, y - padding, w + 2 * padding, h + 2 * padding)
+                boxes.append((elem.get_id(), bb))
+            BBB = compute_blobs(boxes)
 
         # don't mark anything if there is only one blob
         if len(BBB) > 1:
@@ -64,9 +225,6 @@ class MarkBlobs(dynalab.Ext):
                 desc += " " + ", ".join(ids)
                 self.outline_bounding_box(NOTE, None, bb=bbb, margin=0, msg=desc)
 
-        if clean:
-            self.clean_artifacts(force=False)
-
         counter = len(BBB)
         self.message(
             ngettext("{counter} bounding boxes blob found", "{counter} bounding boxes blobs found", counter).format(
@@ -74,11 +232,6 @@ class MarkBlobs(dynalab.Ext):
             ),
             verbosity=1,
         )
-        self.message(
-            _("{extension:s}: running time = {time:.0f}ms").format(extension=self.name, time=self.get_timer()),
-            verbosity=3,
-        )
-        self.message("", verbosity=1)
 
 
 if __name__ == "__main__":
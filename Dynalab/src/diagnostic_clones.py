@@ -9,42 +9,35 @@ from lib import dynalab
 from lib.dynalab import WARNING
 
 
-class MarkClones(dynalab.Ext):
+class MarkClones(dynalab.Diagnostic):
     """
     mark clones
     """
 
     name = _("mark clones")
+    element_types = (inkex.Use,)
+    incremental = True
+    streamable = True
 
     def add_arguments(self, pars):
         pass
 
-    def effect(self, clean=True):
-        self.message(self.name, verbosity=3)
-        self.init_artifact_layer()
+    def init_diagnostic(self):
+        self.counter = 0
 
-        counter = 0
-        for elem in self.selected_or_all(skip_groups=True):
-            desc = _("object with id={id} of type {tag}").format(id=elem.get_id(), tag=elem.tag_name)
-            if isinstance(elem, inkex.Use):
-                ref = elem.href
-                desc += " " + _("is a clone of object {id} of type {tag}").format(id=ref.get_id(), tag=ref.tag_name)
-                counter += 1
-                self.message("\t-", desc, verbosity=2)
-                self.outline_bounding_box(WARNING, elem, msg=desc)
-                continue
-
-        if clean:
-            self.clean_artifacts(force=False)
+    def diagnose(self, elem):
+        desc = _("object with id={id} of type {tag}").format(id=elem.get_id(), tag=elem.tag_name)
+        ref = elem.href
+        desc += " " + _("is a clone of object {id} of type {tag}").format(id=ref.get_id(), tag=ref.tag_name)
+        self.counter += 1
+        self.message("\t-", desc, verbosity=2)
+        self.outline_bounding_box(WARNING, elem, msg=desc)
 
+    def finish_diagnostic(self):
+        counter = self.counter
         self.message(
             ngettext("{counter} clone found", "{counter} clones found", counter).format(counter=counter), verbosity=1
         )
-        self.message(
-            _("{extension:s}: running time = {time:.0f}ms").format(extension=self.name, time=self.get_timer()),
-            verbosity=3,
-        )
-        self.message("", verbosity=1)
 
 
 if __name__ == "__main__":
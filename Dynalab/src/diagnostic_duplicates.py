@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+
+import math
+from gettext import gettext as _
+from gettext import ngettext
+
+import inkex
+
+from lib import dynalab, utils
+from lib.dynalab import WARNING
+
+# Duplicates are found by computing a key from the geometry of each element,
+# in document coordinates (the composed transform is applied) and with the
+# coordinates rounded to the tolerance. Elements with the same key are
+# duplicates, which is checked with a dictionary rather than by comparing all
+# the pairs of elements.
+#   - paths and shapes: the nodes and control points of the subpaths, in a
+#     canonical order (closed subpaths start from their smallest node, each
+#     subpath goes in its "smallest" direction, and the subpaths are sorted),
+#   - circles and ellipses: the center and the axes, so that rotated circles
+#     are duplicates, wherever their path starts,
+#   - clones: the key of the element they reference, with the clone's
+#     transform. The key of a group is made of the keys of its children,
+#     and the subpaths of its paths and shapes are put together, so that the
+#     clone of a group of paths is a duplicate of the same paths combined
+#     into a single path (or of the single path the group contains),
+#   - images: the image data and the position of their corners,
+#   - texts: the text, its attributes and the transform.
+# NOTE: a text and its vectorized version are not found, as this would need
+# inkscape to render the text.
+
+
+def _clone_transform(elem):
+    """return the transform from the coordinates of the element referenced by
+    a clone (see `utils.get_clone_reference_element`) to the coordinates of
+    the clone"""
+    transform = inkex.Transform()
+    while isinstance(elem, inkex.Use):
+        x = elem.to_dimensionless(elem.get("x", "0"))
+        y = elem.to_dimensionless(elem.get("y", "0"))
+        transform = transform @ inkex.Transform(translate=(x, y))
+        elem = elem.href
+        if elem is not None and "transform" in elem.attrib:
+            transform = transform @ inkex.Transform(elem.attrib["transform"])
+    return transform
+
+
+def _canonical_subpath(points):
+    """return a canonical tuple for a subpath, given as the list of its
+    (rounded) points: start point, then control points and end point of each
+    segment
+    The result doesn't depend on the direction of the subpath, nor on the
+    starting point of closed subpaths."""
+    if len(points) > 1 and points[0] == points[-1]:
+        # closed subpath: list of segments (start point, control point, control point)
+        segments = [tuple(points[k : k + 3]) for k in range(0, len(points) - 1, 3)]
+        backward = [(s[0], c2, c1) for (p0, c1, c2), s in zip(segments, segments[1:] + segments[:1])][::-1]
+        start = min(s[0] for s in segments)
+        candidates = []
+        for segs in (segments, backward):
+            for k, s in enumerate(segs):
+                if s[0] == start:
+                    candidates.append(tuple(p for seg in segs[k:] + segs[:k] for p in seg))
+        return min(candidates)
+    return min(tuple(points), tuple(points[::-1]))
+
+
+def _path_key(elem, transform, tolerance):
+    """return the key of a path or shape (other than circles and ellipses)"""
+    a, b, c, d, e, f = transform.a, transform.b, transform.c, transform.d, transform.e, transform.f
+    if isinstance(elem, inkex.Rectangle) and not utils.is_rounded(elem):
+        # NOTE: this is much faster than elem.path, and gives the same nodes
+        x, y, w, h = elem.left, elem.top, elem.width, elem.height
+        corners = [(x, y), (x + w, y), (x + w, y + h), (x, y + h), (x, y)]
+        superpath = [[[p, p, p] for p in corners]]
+    else:
+        superpath = elem.path.to_superpath()
+    subpaths = []
+    for sub in superpath:
+        nodes = [
+            [(round((a * x + c * y + e) / tolerance), round((b * x + d * y + f) / tolerance)) for x, y in node]
+            for node in sub
+        ]
+        points = [nodes[0][1]]
+        for (c0, p0, c1), (c2, p3, c3) in zip(nodes, nodes[1:]):
+            if p0 == c1 == c2 == p3:
+                continue  # empty segment (for example, closing an already closed subpath)
+            points.extend((c1, c2, p3))
+        subpaths.append(_canonical_subpath(points))
+    return ("path", tuple(sorted(subpaths)))
+
+
+def _ellipse_key(elem, transform, tolerance):
+    """return the key of a circle or ellipse
+    The transformed ellipse is the image of the unit circle by the linear map
+    A (transform times radii), and is determined by its center and the
+    symmetric matrix A·Aᵀ, which doesn't depend on rotations of the unit circle."""
+    rx, ry = elem.rxry()
+    cx, cy = transform.apply_to_point(elem.center)
+    a, b, c, d = transform.a, transform.b, transform.c, transform.d
+    width = math.hypot(a * rx, c * ry)  # half width of the bounding box, sqrt((A·Aᵀ)₁₁)
+    height = math.hypot(b * rx, d * ry)  # half height, sqrt((A·Aᵀ)₂₂)
+    xy = (a * b * rx * rx + c * d * ry * ry) / max(width, height, tolerance)
+    return ("ellipse",) + tuple(round(v / tolerance) for v in (cx, cy, width, height, xy))
+
+
+def _key(elem, transform, tolerance):
+    """return the key of an element with the given composed transform, or None if
+    its geometry is not known"""
+    if isinstance(elem, (inkex.Circle, inkex.Ellipse)):
+        return _ellipse_key(elem, transform, tolerance)
+
+    if utils.is_path(elem):
+        return _path_key(elem, transform, tolerance)
+
+    if isinstance(elem, inkex.Use):
+        ref = utils.get_clone_reference_element(elem)
+        if ref is None:
+            return None
+        return _key(ref, transform @ _clone_transform(elem), tolerance)
+
+    if isinstance(elem, inkex.Group):  # also works for symbols
+        keys = []
+        for child in elem:
+            if not isinstance(child, inkex.ShapeElement):
+                continue
+            t = transform @ inkex.Transform(child.attrib["transform"]) if "transform" in child.attrib else transform
+            keys.append(_key(child, t, tolerance))
+        if None in keys:
+            return None
+        if len(keys) == 1:
+            return keys[0]
+        if all(k[0] == "path" for k in keys):
+            return ("path", tuple(sorted(subpath for k in keys for subpath in k[1])))
+        return ("group", tuple(sorted(keys)))
+
+    if isinstance(elem, inkex.Image):
+        import hashlib
+
+        href = elem.get("xlink:href") or elem.get("href") or ""
+        x, y = elem.to_dimensionless(elem.get("x", "0")), elem.to_dimensionless(elem.get("y", "0"))
+        w, h = elem.to_dimensionless(elem.get("width", "0")), elem.to_dimensionless(elem.get("height", "0"))
+        corners = [transform.apply_to_point((px, py)) for px, py in ((x, y), (x + w, y), (x, y + h))]
+        return ("image", hashlib.sha1(href.encode()).hexdigest()) + tuple(
+            round(v / tolerance) for p in corners for v in p
+        )
+
+    if isinstance(elem, inkex.TextElement):
+        content = tuple(
+            (str(e.tag), tuple(sorted((k, v) for k, v in e.attrib.items() if k != "id")), e.text or "", e.tail or "")
+            for e in elem.iter()
+        )
+        linear = tuple(round(v, 6) for v in (transform.a, transform.b, transform.c, transform.d))
+        return ("text", linear, round(transform.e / tolerance), round(transform.f / tolerance), content)
+
+    return None
+
+
+class MarkDuplicates(dynalab.Diagnostic):
+    """
+    mark objects that are duplicates of another object
+    """
+
+    name = _("mark duplicate objects")
+    element_types = (
+        inkex.PathElement,
+        inkex.Rectangle,
+        inkex.Circle,
+        inkex.Ellipse,
+        inkex.Line,
+        inkex.Polyline,
+        inkex.Polygon,
+        inkex.Use,
+        inkex.Image,
+        inkex.TextElement,
+    )
+
+    def add_arguments(self, pars):
+        pars.add_argument(
+            "--duplicate-tolerance",
+            type=float,
+            default=0.01,
+            dest="duplicate_tolerance",
+            help="distance under which coordinates are considered equal (mm)",
+        )
+
+    def init_diagnostic(self):
+        self.tolerance = self.mm_to_svg(self.options.duplicate_tolerance) or 1e-9
+        self.keys = {}  # first element found for each key
+        self.counter = 0
+
+    def diagnose(self, elem):
+        key = _key(elem, self.composed_transform(elem), self.tolerance)
+        if key is None:
+            return
+        original = self.keys.setdefault(key, elem)
+        if original is elem:
+            return
+        desc = _("object with id={id} of type {tag}").format(id=elem.get_id(), tag=elem.tag_name)
+        desc += " " + _("is a duplicate of object with id={id}").format(id=original.get_id())
+        self.counter += 1
+        self.message("\t-", desc, verbosity=2)
+        self.outline_bounding_box(WARNING, elem, msg=desc)
+
+    def finish_diagnostic(self):
+        counter = self.counter
+        self.message(
+            ngettext("{counter} duplicate object found", "{counter} duplicate objects found", counter).format(
+                counter=counter
+            ),
+            verbosity=1,
+        )
+
+
+if __name__ == "__main__":
+    MarkDuplicates().run()
@@ -9,52 +9,42 @@ from lib import dynalab
 from lib.dynalab import WARNING
 
 
-class MarkOutside(dynalab.Ext):
+class MarkOutside(dynalab.Diagnostic):
     """
     mark objects that lie outside the SVG page
     """
 
     name = _("mark object outside page")
+    incremental = True
+    batch_bounding_boxes = True
 
     def add_arguments(self, pars):
         pass
 
-    def effect(self, clean=True):
-        self.message(self.name, verbosity=3)
-        self.init_artifact_layer()
-
+    def init_diagnostic(self):
         w = self.svg.unittouu(self.svg.viewport_width)
         h = self.svg.unittouu(self.svg.viewport_height)
 
-        viewbox = inkex.BoundingBox((0, w), (0, h))
-
-        counter = 0
-        for elem in self.selected_or_all(skip_groups=True):
+        self.viewbox = inkex.BoundingBox((0, w), (0, h))
+        self.counter = 0
 
+    def diagnose(self, elem):
+        bb = self.bounding_box(elem)
+        if not (bb & self.viewbox):
             desc = _("object with id={id} of type {tag}").format(id=elem.get_id(), tag=elem.tag_name)
+            desc += " " + _("lies outside the page")
+            self.counter += 1
+            self.message("\t-", desc, verbosity=2)
+            self.outline_bounding_box(WARNING, elem, bb=bb, msg=desc)
 
-            bb = self.bounding_box(elem)
-            if not (bb & viewbox):
-                counter += 1
-                desc += " " + _("lies outside the page")
-                self.message("\t-", desc, verbosity=2)
-                self.outline_bounding_box(WARNING, elem, bb=bb, msg=desc)
-                continue
-
-        if clean:
-            self.clean_artifacts(force=False)
-
+    def finish_diagnostic(self):
+        counter = self.counter
         self.message(
             ngettext(
                 "{counter} object lies outside the SVG page", "{counter} objects lie outside the SVG page", counter
             ).format(counter=counter),
             verbosity=1,
         )
-        self.message(
-            _("{extension:s}: running time = {time:.0f}ms").format(extension=self.name, time=self.get_timer()),
-            verbosity=3,
-        )
-        self.message("", verbosity=1)
 
 
 if __name__ == "__main__":
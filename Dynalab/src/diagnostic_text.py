@@ -9,42 +9,35 @@ from lib import dynalab
 from lib.dynalab import WARNING
 
 
-class MarkText(dynalab.Ext):
+class MarkText(dynalab.Diagnostic):
     """
     mark text objects
     """
 
     name = _("mark text")
+    element_types = (inkex.TextElement,)
+    incremental = True
+    streamable = True
 
     def add_arguments(self, pars):
         pass
 
-    def effect(self, clean=True):
-        self.message(self.name, verbosity=3)
-        self.init_artifact_layer()
+    def init_diagnostic(self):
+        self.counter = 0
 
-        counter = 0
-        for elem in self.selected_or_all(skip_groups=True):
-            desc = _("object with id={id} of type {tag}").format(id=elem.get_id(), tag=elem.tag_name)
-            if isinstance(elem, inkex.TextElement):
-                desc += " " + _("is a text object")
-                counter += 1
-                self.message("\t-", desc, verbosity=2)
-                self.outline_bounding_box(WARNING, elem, msg=desc)
-                continue
-
-        if clean:
-            self.clean_artifacts(force=False)
+    def diagnose(self, elem):
+        desc = _("object with id={id} of type {tag}").format(id=elem.get_id(), tag=elem.tag_name)
+        desc += " " + _("is a text object")
+        self.counter += 1
+        self.message("\t-", desc, verbosity=2)
+        self.outline_bounding_box(WARNING, elem, msg=desc)
 
+    def finish_diagnostic(self):
+        counter = self.counter
         self.message(
             ngettext("{counter} text object found", "{counter} text objects found", counter).format(counter=counter),
             verbosity=1,
         )
-        self.message(
-            _("{extension:s}: running time = {time:.0f}ms").format(extension=self.name, time=self.get_timer()),
-            verbosity=3,
-        )
-        self.message("", verbosity=1)
 
 
 if __name__ == "__main__":
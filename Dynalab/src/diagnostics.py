@@ -27,7 +27,7 @@ EXTENSIONS = {
 
 class Battery(dynalab.Ext):
     """
-    battery of simple diagnostics run sequentially
+    battery of simple diagnostics run with a single traversal of the document
     """
 
     name = _("diagnostics")
@@ -46,31 +46,28 @@ class Battery(dynalab.Ext):
             dest="outside_objects",
         )
         pars.add_argument("--open-paths", type=inkex.Boolean, default=True, help="mark open paths", dest="open_paths")
+        pars.add_argument(
+            "--incremental", type=inkex.Boolean, default=True, help="only diagnose objects modified since last run"
+        )
 
         for Ext in EXTENSIONS.values():
             for ext in Ext:
                 inst = ext(reset_artifacts=False)
                 inst.add_arguments(pars)
 
-    def effect(self):
-        reset_artifacts = True
-        inst = None
-        counter = 0
-        BB = {}
+    def diagnostics(self):
+        """return the diagnostics selected by the options"""
+        diagnostics = []
         for name, Ext in EXTENSIONS.items():
             if getattr(self.options, name):
                 for ext in Ext:
-                    inst = ext(reset_artifacts=reset_artifacts)
-                    reset_artifacts = False
-                    inst.options = self.options
-                    inst.document = self.document
-                    inst.svg = self.svg
-                    inst.BB = BB
-                    inst.effect(clean=False)
-                    BB = inst.BB
-                    counter += 1
-        if inst:
-            inst.clean_artifacts(force=False)
+                    diagnostics.append(ext())
+        return diagnostics
+
+    def effect(self):
+        diagnostics = self.diagnostics()
+        self.run_diagnostics(diagnostics, incremental=self.options.incremental)
+        counter = len(diagnostics)
 
         self.message(
             ngettext(
@@ -79,7 +76,7 @@ class Battery(dynalab.Ext):
             verbosity=1,
         )
         self.message(
-            _("{extension:s}: running time = {time:.0f}ms").format(extension=self.name, time=self.get_timer()),
+            _("{extension:s}: running time = {time:.0f}ms").format(extension=self.name, time=self.running_time()),
             verbosity=3,
         )
         self.message("", verbosity=1)
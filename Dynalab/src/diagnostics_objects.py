@@ -34,29 +34,26 @@ class Battery(dynalab.Ext):
         pars.add_argument("--shapes", type=inkex.Boolean, default=True, help="mark non-path shapes")
         pars.add_argument("--clones", type=inkex.Boolean, default=True, help="mark clones")
         pars.add_argument("--effects", type=inkex.Boolean, default=True, help="mark objects with effects")
+        pars.add_argument(
+            "--incremental", type=inkex.Boolean, default=True, help="only diagnose objects modified since last run"
+        )
 
         for ext in EXTENSIONS.values():
             inst = ext(reset_artifacts=False)
             inst.add_arguments(pars)
 
-    def effect(self):
-        reset_artifacts = True
-        inst = None
-        counter = 0
-        bbs = {}
+    def diagnostics(self):
+        """return the diagnostics selected by the options"""
+        diagnostics = []
         for name, ext in EXTENSIONS.items():
             if getattr(self.options, name):
-                inst = ext(reset_artifacts=reset_artifacts)
-                reset_artifacts = False
-                inst.options = self.options
-                inst.document = self.document
-                inst.svg = self.svg
-                inst.bb = bbs
-                inst.effect(clean=False)
-                bbs = inst.bb
-                counter += 1
-        if inst:
-            inst.clean_artifacts(force=False)
+                diagnostics.append(ext())
+        return diagnostics
+
+    def effect(self):
+        diagnostics = self.diagnostics()
+        self.run_diagnostics(diagnostics, incremental=self.options.incremental)
+        counter = len(diagnostics)
 
         self.message(
             ngettext(
@@ -65,7 +62,7 @@ class Battery(dynalab.Ext):
             verbosity=1,
         )
         self.message(
-            _("{extension:s}: running time = {time:.0f}ms").format(extension=self.name, time=self.get_timer()),
+            _("{extension:s}: running time = {time:.0f}ms").format(extension=self.name, time=self.running_time()),
             verbosity=3,
         )
         self.message("", verbosity=1)
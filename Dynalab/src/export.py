@@ -2,13 +2,40 @@
 
 import os
 import re
+import shutil
 import sys
 from gettext import gettext as _
 from gettext import ngettext
 
 import inkex
 
-from lib import dynalab
+from lib import cache, dxf, dynalab, shell
+
+# export formats, indexed by option: (name, file extension, export type, inkscape extension)
+# NOTE: DXF is written by the extension itself (see export_dxf), which is
+# much faster than inkscape's "dxf_outlines" extension and doesn't need the
+# document to be saved. Its export type is None.
+FORMATS = {
+    "svg": ("SVG", ".svg", "svg", None),
+    "dxf": ("DXF14", ".dxf", None, None),
+    "pdf": ("PDF", ".pdf", "pdf", None),
+}
+
+# layers of the DXF file, with the configuration key of their stroke color
+DXF_LAYERS = [
+    ("cut", "laser_mode_cut_color"),
+    ("fill", "laser_mode_fill_color"),
+    ("line", "laser_mode_line_color"),
+]
+
+
+def _has_relative_links(svg):
+    """return true if some images of the document link to files with relative paths"""
+    for image in svg.iter(inkex.addNS("image", "svg")):
+        href = image.get("xlink:href") or image.get("href") or ""
+        if href and not href.startswith(("data:", "file:", "#")) and not os.path.isabs(href):
+            return True
+    return False
 
 
 class Export(dynalab.Ext):
@@ -68,77 +95,122 @@ class Export(dynalab.Ext):
         if self.options.clean:
             self.clean_artifacts(force=True)
 
-        counter = 0
-        if self.options.svg:
-            counter += 1
-            self.message("\t-", _("exporting to {format}").format(format="SVG") + ": " + savefile + ".svg", verbosity=1)
-            self.set_timer("export_svg")
-            self.export_with_inkscape(savefile + ".svg", "svg")
-            self.message(
-                "\t\t",
-                _("{extension:s}: running time = {time:.0f}ms").format(
-                    extension=_("exporting to {format}").format(format="SVG"), time=self.get_timer("export_svg")
-                ),
-                verbosity=3,
-            )
+        # exports of the same document with the same options are re-used
+        # (see `cache.ExportCache`)
+        export_cache = cache.ExportCache(self.options.savedir)
+        document = document_key = None
 
-        if self.options.dxf:
-            # NOTE: exporting to dxf defaults to dxf12, so I have to
-            # explicitly give the extension id
-            # NOTE: by default, exporting to dxf14 uses "unit_from_document"
-            # so there shouldn't be any need to specify "units:mm"
-            # which is great because I don't know how to do that.
-            counter += 1
-            self.message(
-                "\t-", _("exporting to {format}").format(format="DXF14") + ": " + savefile + ".dxf", verbosity=1
-            )
-            self.set_timer("export_dxf")
-            self.export_with_inkscape(
-                savefile + ".dxf",
-                "dxf",
-                "--export-extension=org.ekips.output.dxf_outlines",
-            )
-            self.message(
-                "\t\t",
-                _("{extension:s}: running time = {time:.0f}ms").format(
-                    extension=_("exporting to {format}").format(format="DXF14"), time=self.get_timer("export_dxf")
-                ),
-                verbosity=3,
-            )
-
-        if self.options.pdf:
+        exports = []
+        names = []
+        counter = 0
+        for option, (name, suffix, export_type, extension) in FORMATS.items():
+            if not getattr(self.options, option):
+                continue
             counter += 1
-            self.message("\t-", _("exporting to {format}").format(format="PDF") + ": " + savefile + ".pdf", verbosity=1)
-            self.set_timer("export_pdf")
-            self.export_with_inkscape(savefile + ".pdf", "pdf")
+            self.message("\t-", _("exporting to {format}").format(format=name) + ": " + savefile + suffix, verbosity=1)
+            if export_type is None:
+                with self.span("export", formats=name) as span:
+                    n = self.export_dxf(savefile + suffix)
+                self.message(
+                    "\t\t", ngettext("{counter} DXF entity", "{counter} DXF entities", n).format(counter=n), verbosity=2
+                )
+                self.message(
+                    "\t\t",
+                    _("{extension:s}: running time = {time:.0f}ms").format(
+                        extension=_("exporting to {format}").format(format=name), time=span.duration
+                    ),
+                    verbosity=3,
+                )
+                continue
+            if document is None:
+                # the (cleaned) document in memory is what inkscape exports
+                document = self.export_document()
+                document_key = self.export_key(document)
+            key = f"{document_key}:{export_type}:{extension}"
+            previous = export_cache.get(key)
+            if previous is None:
+                exports.append((savefile + suffix, export_type, extension))
+                names.append(name)
+            elif os.path.realpath(previous) == os.path.realpath(savefile + suffix):
+                self.message("\t\t", _("unchanged since the previous export"), verbosity=2)
+            else:
+                shutil.copyfile(previous, savefile + suffix)
+                export_cache.set(key, savefile + suffix)
+                self.message(
+                    "\t\t", _("copied from the previous export {filename}").format(filename=previous), verbosity=2
+                )
+
+        if exports:
+            with self.span("export", category="subprocess", formats=", ".join(names)) as span:
+                self.export_with_inkscape(document, exports)
             self.message(
                 "\t\t",
                 _("{extension:s}: running time = {time:.0f}ms").format(
-                    extension=_("exporting to {format}").format(format="PDF"), time=self.get_timer("export_dxf")
+                    extension=_("exporting to {format}").format(format=", ".join(names)), time=span.duration
                 ),
                 verbosity=3,
             )
+            for export_file, export_type, extension in exports:
+                export_cache.set(f"{document_key}:{export_type}:{extension}", export_file)
+        export_cache.save()
 
         self.message(
             ngettext("{counter} document exported", "{counter} documents exported", counter).format(counter=counter)
         )
         self.message(
-            _("{extension:s}: running time = {time:.0f}ms").format(extension=self.name, time=self.get_timer()),
+            _("{extension:s}: running time = {time:.0f}ms").format(extension=self.name, time=self.running_time()),
             verbosity=3,
         )
         self.message("", verbosity=1)
 
-    def export_with_inkscape(self, savefile, export_format, *args):
-        if not self.options.input_file:
-            self.abort(_("You must save your project."))
-
+    def export_document(self):
+        """serialize the document in memory, without the outcomes of
+        incremental diagnostics (see `dynalab.Ext.run_diagnostics`), which are
+        only useful in the document being edited"""
+        outcomes = self.svg.getElementById(dynalab.OUTCOMES_ID)
+        if outcomes is None:
+            return self.svg.tostring()
+        parent = outcomes.getparent()
+        index = parent.index(outcomes)
+        parent.remove(outcomes)
         try:
-            inkex.command.inkscape(
-                self.options.input_file,
-                f"--export-filename={savefile}",
-                f"--export-type={export_format}",
-                *args,
-            )
+            return self.svg.tostring()
+        finally:
+            parent.insert(index, outcomes)
+
+    def export_key(self, document):
+        """return a hash identifying the exported (serialized) document
+        Together with the export options, it identifies the exported files
+        (see `cache.ExportCache`)."""
+        import hashlib
+
+        return hashlib.sha1(document).hexdigest()
+
+    def export_dxf(self, filename):
+        """export the (in memory) document to DXF, with a layer for each
+        laser mode (see lib/dxf.py)
+        Return the number of entities written."""
+        layers = [(layer, self.config.get(key)) for layer, key in DXF_LAYERS]
+        return dxf.export(self.svg, filename, layers, self.svg_to_mm(1))
+
+    def export_with_inkscape(self, document, exports):
+        """export the serialized document with inkscape
+        The exports are given as tuples (savefile, export_format, extension)
+        and are all done by a single command sent to the inkscape shell (see
+        `shell.export_all`), so that inkscape is started only once and reads
+        the document only once. The document is given to inkscape as a
+        temporary file, in memory when possible (see
+        `shell.temporary_file`), so that it doesn't need to be saved.
+        If the document links to files with relative paths, the temporary
+        file is put next to the original document instead, so that inkscape
+        can still find them."""
+        parent = self.svg_path() if _has_relative_links(self.svg) else None
+        try:
+            self.count("external inkscape commands")
+            with shell.temporary_file(self.options.filename + ".svg", parent) as svg_file:
+                with open(svg_file, mode="wb") as f:
+                    f.write(document)
+                shell.export_all(svg_file, exports)
         except inkex.command.ProgramRunError as e:
             self.abort(
                 f"external inkscape command failed with error code {e.returncode}",
@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+
+import json
+import os
+from collections import OrderedDict
+
+import inkex
+from lxml import etree
+
+from lib import utils
+
+# NOTE: hashlib is imported when needed (see the note in dynalab.py)
+
+BB_CACHE_FILE = os.path.realpath(os.path.join(os.path.dirname(os.path.realpath(__file__)), "bb_cache.json"))
+BB_CACHE_SIZE = 10000  # maximum number of bounding boxes kept in the cache
+
+EXPORT_MANIFEST = ".dynalab_exports.json"  # manifest of the exports, in the export directory
+EXPORT_MANIFEST_SIZE = 100  # maximum number of exports recorded in the manifest
+
+
+def element_key(elem, transform=None):
+    """compute a key identifying the bounding box of an element
+    It is a hash of the element's serialized subtree (and of the referenced
+    element for clones), its composed transform and its computed style.
+    The composed transform can be given if it is already known."""
+    import hashlib
+
+    if transform is None:
+        transform = elem.composed_transform()
+    h = hashlib.sha1()
+    h.update(etree.tostring(elem, with_tail=False))
+    ref = utils.get_clone_reference_element(elem)
+    if ref is not elem:
+        h.update(etree.tostring(ref, with_tail=False))
+    h.update(str(transform).encode())
+    h.update(str(elem.specified_style()).encode())
+    return h.hexdigest()
+
+
+def element_context(elem, contexts):
+    """compute a hash identifying what an element inherits from its ancestors
+    It is computed from the attributes (styles, transforms, etc.) of the
+    element and of its ancestors, and from the definitions and stylesheets
+    of the document. The hashes are memoized in the `contexts` dictionary."""
+    import hashlib
+
+    context = contexts.get(elem)
+    if context is None:
+        h = hashlib.sha1()
+        parent = elem.getparent()
+        if parent is not None:
+            h.update(element_context(parent, contexts))
+        else:
+            for e in elem:
+                if isinstance(e, (inkex.Defs, inkex.Style)):
+                    h.update(etree.tostring(e, with_tail=False))
+        h.update(repr(sorted(elem.attrib.items())).encode())
+        context = contexts[elem] = h.digest()
+    return context
+
+
+def element_content(elem, contents):
+    """compute a hash identifying the serialized subtree of an element
+    It is computed from the tag, attributes and text of the element, and from
+    the hashes of its children (and their tails), so that the subtree of each
+    element is only looked at once, even when the fingerprints of all the
+    groups of the document are computed. The hashes are memoized in the
+    `contents` dictionary."""
+    import hashlib
+
+    content = contents.get(elem)
+    if content is None:
+        h = hashlib.sha1()
+        if isinstance(elem.tag, str):
+            h.update(repr((elem.tag, sorted(elem.attrib.items()), elem.text)).encode())
+        else:
+            # comments, processing instructions, etc.
+            h.update(etree.tostring(elem, with_tail=False))
+        for child in elem:
+            h.update(element_content(child, contents))
+            h.update(repr(child.tail).encode())
+        content = contents[elem] = h.digest()
+    return content
+
+
+def element_fingerprint(elem, contexts, contents):
+    """compute a compact fingerprint of an element, used to detect the
+    elements that changed since the last run (see `Ext.run_diagnostics`)
+    It is similar to `element_key`, but the computed style and composed
+    transform of the element (which are slow to compute) are replaced by the
+    hash of its ancestors (see `element_context`), and its serialized subtree
+    is replaced by the hash of its content (see `element_content`)."""
+    import hashlib
+
+    h = hashlib.sha1()
+    h.update(element_context(elem.getparent(), contexts))
+    h.update(element_content(elem, contents))
+    ref = utils.get_clone_reference_element(elem)
+    if ref is not None and ref is not elem:
+        h.update(element_content(ref, contents))
+    return h.hexdigest()[:16]
+
+
+class BBCache:
+    """persistent cache for the bounding boxes computed by the external
+    inkscape command
+    Each extension is run in a new process, so the cache is kept in a file
+    (next to the configuration file). Bounding boxes are indexed by the key
+    computed by `element_key`, and the least recently used ones are discarded
+    when the cache grows bigger than `size`.
+    """
+
+    def __init__(self, filename=None, size=BB_CACHE_SIZE):
+        self.filename = filename or BB_CACHE_FILE
+        self.size = size
+        self.boxes = None  # the file is only read when needed
+        self.modified = False
+
+    def load(self):
+        """read the cache file
+        A missing or invalid cache file is silently ignored."""
+        self.boxes = OrderedDict()
+        try:
+            with open(self.filename, mode="rt") as f:
+                self.boxes.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+
+    def get(self, key):
+        """return the bounding box for the given key, or None if it isn't in the cache"""
+        if self.boxes is None:
+            self.load()
+        # NOTE: older versions of the cache recorded failures as null
+        xywh = self.boxes.get(key)
+        if xywh is None:
+            return None
+        # NOTE: the cache isn't marked as modified, so that runs that only
+        # hit the cache don't rewrite the file: the new order is only saved
+        # together with the next new bounding box
+        self.boxes.move_to_end(key)
+        return inkex.BoundingBox.new_xywh(*xywh)
+
+    def set(self, key, bb):
+        """record the bounding box for the given key
+        Empty bounding boxes are not recorded, as they come from a failure of
+        the external inkscape command."""
+        if not bb:
+            return
+        if self.boxes is None:
+            self.load()
+        self.boxes[key] = [bb.left, bb.top, bb.width, bb.height]
+        self.boxes.move_to_end(key)
+        self.modified = True
+
+    def save(self):
+        """write the cache file, discarding the least recently used bounding boxes
+        Errors are silently ignored, as the cache is only used to speed things up."""
+        if not self.modified:
+            return
+        while len(self.boxes) > self.size:
+            self.boxes.popitem(last=False)
+        tmp = f"{self.filename}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, mode="wt") as f:
+                json.dump(self.boxes, f)
+            os.replace(tmp, self.filename)
+        except OSError:
+            pass
+        self.modified = False
+
+
+class ExportCache:
+    """manifest of the files exported in a directory, used to re-use them
+    Exported files are indexed by a key identifying the exported document
+    and the export options (see `Export.export_key`). They are recorded
+    with their size and modification time, so that files that were modified
+    or removed since their export are not re-used. Only the `size` most
+    recent exports are kept.
+    """
+
+    def __init__(self, directory, size=EXPORT_MANIFEST_SIZE):
+        self.directory = directory
+        self.filename = os.path.join(directory, EXPORT_MANIFEST)
+        self.size = size
+        self.exports = OrderedDict()  # key => [filename, size, modification time]
+        self.modified = False
+        self.load()
+
+    def load(self):
+        """read the manifest
+        A missing or invalid manifest is silently ignored."""
+        try:
+            with open(self.filename, mode="rt") as f:
+                self.exports.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+
+    def get(self, key):
+        """return the path of the file exported for the given key, or None if
+        there is none, or if it was modified or removed since"""
+        entry = self.exports.get(key)
+        if entry is None:
+            return None
+        filename = os.path.join(self.directory, entry[0])
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return None
+        if [stat.st_size, stat.st_mtime_ns] != entry[1:]:
+            return None
+        return filename
+
+    def set(self, key, filename):
+        """record the file exported for the given key"""
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return
+        self.exports[key] = [os.path.relpath(filename, self.directory), stat.st_size, stat.st_mtime_ns]
+        self.exports.move_to_end(key)
+        self.modified = True
+
+    def save(self):
+        """write the manifest, discarding the oldest exports
+        Errors are silently ignored, as the manifest is only used to speed things up."""
+        if not self.modified:
+            return
+        while len(self.exports) > self.size:
+            self.exports.popitem(last=False)
+        tmp = f"{self.filename}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, mode="wt") as f:
+                json.dump(self.exports, f, indent=2)
+            os.replace(tmp, self.filename)
+        except OSError:
+            pass
+        self.modified = False
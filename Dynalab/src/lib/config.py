@@ -29,6 +29,8 @@ DEFAULT_CONFIG = OrderedDict(
     }
 )
 
+_current = None  # current configuration, once read by this process (see Ext.load_config)
+
 
 class Ext:
 
@@ -42,14 +44,26 @@ class Ext:
         self.load_config(DEFAULT_CONFIG_FILE)
 
     def load_config(self, filename=CURRENT_CONFIG_FILE):
+        """load a configuration file, which becomes the current configuration
+        The current configuration file is only read once by each process (the
+        batteries of diagnostics create many extensions), and is only
+        rewritten when its content changes."""
+        global _current
+        filename = os.path.realpath(filename)
+        if filename == CURRENT_CONFIG_FILE and _current is not None:
+            self.config = dict(_current)
+            return
+
+        missing = False
         try:
             f = open(filename, mode="rt")
             self.config = json.load(f)
             f.close()
 
         except FileNotFoundError as err:
-            if os.path.realpath(filename) == DEFAULT_CONFIG_FILE or os.path.realpath(filename) == CURRENT_CONFIG_FILE:
+            if filename == DEFAULT_CONFIG_FILE or filename == CURRENT_CONFIG_FILE:
                 self.config = {o: v[0] for o, v in DEFAULT_CONFIG.items()}
+                missing = True
             else:
                 raise inkex.AbortExtension(
                     """
@@ -80,6 +94,7 @@ class Ext:
                 )
             )
 
+        read = dict(self.config)
         for k, v in DEFAULT_CONFIG.items():
             if k not in self.config:
                 self.config[k] = v[0]
@@ -89,21 +104,32 @@ class Ext:
                 del self.config[k]
 
         # save config so that future run use this new configuration
-        self.save_config(CURRENT_CONFIG_FILE)
+        if filename != CURRENT_CONFIG_FILE or missing or self.config != read:
+            self.save_config(CURRENT_CONFIG_FILE)
+        else:
+            _current = dict(self.config)
 
     def save_config(self, filename, **kwargs):
+        global _current
         filename = os.path.realpath(filename)
         if filename == DEFAULT_CONFIG_FILE:
             raise inkex.AbortExtension(_("CANNOT OVERWRITE DEFAULT CONFIG FILE: {filename}").format(filename=filename))
 
+        # NOTE: the file is written under a temporary name and then renamed,
+        # so that extensions running concurrently (see batch.py) never read a
+        # partial file
+        tmp = f"{filename}.{os.getpid()}.tmp"
         try:
-            with open(filename, mode="wt") as f:
+            with open(tmp, mode="wt") as f:
                 for k, v in kwargs:
                     self.config[k] = v
                     # TODO: should I validate that keys and values are valid???
                     # colors => ^$|^#[0-9a-fA-F]{6}$|^#[0-9a-fA-F]{3}$
 
                 f.write(json.dumps(self.config, indent=2, sort_keys=True))
+            os.replace(tmp, filename)
+            if filename == CURRENT_CONFIG_FILE:
+                _current = dict(self.config)
         except (FileNotFoundError, PermissionError, IsADirectoryError, OSError) as err:
             raise inkex.AbortExtension(f"CANNOT SAVE CONFIG TO {filename}: {err}")
             raise inkex.AbortExtension(
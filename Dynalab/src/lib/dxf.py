@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+
+import inkex
+
+from lib import utils
+
+# DXF (R14) export of the paths and shapes of a document.
+#
+# The document is read from memory (no inkscape process is needed) and the
+# DXF file is built as a list of strings, written at once at the end.
+#   - coordinates are in mm, with the origin at the bottom left corner of the
+#     page and the y axis going up,
+#   - subpaths made of straight segments only are written as LWPOLYLINE
+#     entities, the other ones as cubic SPLINE entities (each Bézier segment
+#     is a span of the spline, with inner knots of multiplicity 3),
+#   - entities are put on layers according to their stroke color, other
+#     colors go to layer "0".
+# Only the sections read by laser cutting software are written (HEADER,
+# TABLES and ENTITIES).
+# NOTE: texts and images are not exported, as with inkscape's "dxf_outlines"
+# extension.
+
+# AutoCAD Color Index of the basic colors, used for the colors of the layers
+ACI_COLORS = {
+    1: (255, 0, 0),
+    2: (255, 255, 0),
+    3: (0, 255, 0),
+    4: (0, 255, 255),
+    5: (0, 0, 255),
+    6: (255, 0, 255),
+    7: (0, 0, 0),  # NOTE: black or white depending on the background
+    8: (128, 128, 128),
+}
+
+DEFAULT_LAYER = "0"
+EPSILON = 1e-9  # distance (in mm) under which points are considered equal
+
+
+def _rgb(color):
+    """return the RGB components of a color, or None if it isn't a plain color"""
+    if color is None or color == "none":
+        return None
+    try:
+        return tuple(inkex.Color(color).to_rgb())
+    except inkex.colors.ColorError:
+        return None
+
+
+def _aci(rgb):
+    """return the AutoCAD Color Index of the basic color closest to the given one"""
+    if rgb is None:
+        return 7
+    return min(ACI_COLORS, key=lambda n: sum((a - b) ** 2 for a, b in zip(ACI_COLORS[n], rgb)))
+
+
+def _style(elem, stylesheets=False):
+    """return the style properties of an element as a dictionary
+    If the document has stylesheets, or if the element has a class, the
+    style given by the stylesheets is computed by inkex.
+    NOTE: otherwise, the style attribute is parsed by hand, which is much
+    faster than inkex.Style (which parses the full CSS syntax), and is enough
+    to get the stroke color and visibility"""
+    if stylesheets or "class" in elem.attrib:
+        return elem.specified_style()
+    style = {}
+    for declaration in elem.attrib.get("style", "").split(";"):
+        name, sep, value = declaration.partition(":")
+        if sep:
+            style[name.strip()] = value.strip()
+    return style
+
+
+def _apply(transform, points):
+    """apply a transform to a list of points (as pairs of coordinates)"""
+    a, b, c, d, e, f = transform.a, transform.b, transform.c, transform.d, transform.e, transform.f
+    return [(a * x + c * y + e, b * x + d * y + f) for x, y in points]
+
+
+def _same_point(p, q):
+    return abs(p[0] - q[0]) < EPSILON and abs(p[1] - q[1]) < EPSILON
+
+
+def _shapes(elem, transform, stroke, stylesheets=False):
+    """iterates over the paths and shapes below an element, as tuples
+    (element, composed transform, stroke color)
+    Hidden elements are skipped and clones are replaced by the elements they
+    reference. Strokes are inherited from groups and clones. `stylesheets`
+    tells if the document contains stylesheets (see `_style`)."""
+    if not isinstance(elem, inkex.ShapeElement):  # metadata, definitions, ...
+        return
+    style = _style(elem, stylesheets)
+    if style.get("display", elem.attrib.get("display")) == "none":
+        return
+    s = style.get("stroke", elem.attrib.get("stroke"))
+    if s is not None and s != "inherit":
+        stroke = s
+    if "transform" in elem.attrib:
+        transform = transform @ inkex.Transform(elem.attrib["transform"])
+
+    if utils.is_path(elem):
+        yield elem, transform, stroke
+    elif isinstance(elem, inkex.Use):
+        ref = elem.href
+        if ref is None:
+            return
+        x = elem.to_dimensionless(elem.get("x", "0"))
+        y = elem.to_dimensionless(elem.get("y", "0"))
+        transform = transform @ inkex.Transform(translate=(x, y))
+        if isinstance(ref, inkex.Symbol):
+            for child in ref:
+                yield from _shapes(child, transform, stroke, stylesheets)
+        else:
+            yield from _shapes(ref, transform, stroke, stylesheets)
+    elif isinstance(elem, inkex.Group):
+        for child in elem:
+            yield from _shapes(child, transform, stroke, stylesheets)
+
+
+class Writer:
+    """DXF document built in memory
+    Entities are added with `polyline` and `spline` (or `add_path`) and the
+    file is written with `write`."""
+
+    def __init__(self, layers):
+        """`layers` is a list of pairs (name, color) where color is an SVG color"""
+        self.layers = [(name, _rgb(color)) for name, color in layers]
+        self.stroke_layers = {}  # layers of the stroke colors seen so far
+        self.entities = []  # group codes and values of the entities
+        self.handle = 0x100  # last handle used (smaller ones are for the tables)
+        self.counter = 0  # number of entities
+
+    def _next_handle(self):
+        self.handle += 1
+        return f"{self.handle:X}"
+
+    def layer(self, stroke):
+        """return the layer for a stroke color"""
+        layer = self.stroke_layers.get(stroke)
+        if layer is None:
+            rgb = _rgb(stroke)
+            layer = next((name for name, color in self.layers if rgb is not None and rgb == color), DEFAULT_LAYER)
+            self.stroke_layers[stroke] = layer
+        return layer
+
+    def polyline(self, layer, points, closed=False):
+        """add a LWPOLYLINE entity"""
+        self.counter += 1
+        out = self.entities
+        out.append(f"0\nLWPOLYLINE\n5\n{self._next_handle()}\n100\nAcDbEntity\n8\n{layer}\n100\nAcDbPolyline")
+        out.append(f"90\n{len(points)}\n70\n{1 if closed else 0}")
+        out.extend(f"10\n{x:.6f}\n20\n{y:.6f}" for x, y in points)
+
+    def spline(self, layer, points):
+        """add a cubic SPLINE entity from the control points of consecutive
+        Bézier segments (3n+1 points for n segments)"""
+        self.counter += 1
+        n = (len(points) - 1) // 3
+        knots = [0] * 4 + [k for k in range(1, n) for _ in range(3)] + [n] * 4
+        out = self.entities
+        out.append(f"0\nSPLINE\n5\n{self._next_handle()}\n100\nAcDbEntity\n8\n{layer}\n100\nAcDbSpline")
+        out.append(f"210\n0.0\n220\n0.0\n230\n1.0\n70\n8\n71\n3\n72\n{len(knots)}\n73\n{len(points)}\n74\n0")
+        out.extend(f"40\n{k}" for k in knots)
+        out.extend(f"10\n{x:.6f}\n20\n{y:.6f}\n30\n0.0" for x, y in points)
+
+    def add_path(self, layer, superpath, transform):
+        """add the subpaths of an inkex.CubicSuperPath, after applying a transform"""
+        for subpath in superpath:
+            if len(subpath) < 2:
+                continue
+            # nodes of the subpath, as (control point, point, control point)
+            coords = _apply(transform, [p for node in subpath for p in node])
+            nodes = [coords[k : k + 3] for k in range(0, len(coords), 3)]
+            straight = True
+            points = [nodes[0][1]]
+            for (c0, p0, c1), (c2, p3, c3) in zip(nodes, nodes[1:]):
+                line = _same_point(p0, c1) and _same_point(c2, p3)
+                if line and _same_point(p0, p3):
+                    continue  # empty segment (for example, closing an already closed subpath)
+                straight = straight and line
+                points.extend((c1, c2, p3))
+            if len(points) < 2:
+                continue
+            if straight:
+                vertices = points[::3]
+                closed = len(vertices) > 2 and _same_point(vertices[0], vertices[-1])
+                self.polyline(layer, vertices[:-1] if closed else vertices, closed=closed)
+            else:
+                self.spline(layer, points)
+
+    def dumps(self):
+        """return the content of the DXF file"""
+        # handles below 0x100 are used by the tables
+        header = [
+            "0\nSECTION\n2\nHEADER",
+            "9\n$ACADVER\n1\nAC1014",
+            "9\n$INSUNITS\n70\n4",  # mm
+            f"9\n$HANDSEED\n5\n{self.handle + 1:X}",
+            "0\nENDSEC",
+        ]
+        layers = [(DEFAULT_LAYER, None)] + self.layers
+        tables = [
+            "0\nSECTION\n2\nTABLES",
+            "0\nTABLE\n2\nLTYPE\n5\n1\n100\nAcDbSymbolTable\n70\n1",
+            "0\nLTYPE\n5\n2\n100\nAcDbSymbolTableRecord\n100\nAcDbLinetypeTableRecord\n2\nCONTINUOUS\n70\n0",
+            "3\nSolid line\n72\n65\n73\n0\n40\n0.0",
+            "0\nENDTAB",
+            f"0\nTABLE\n2\nLAYER\n5\n3\n100\nAcDbSymbolTable\n70\n{len(layers)}",
+        ]
+        for k, (name, color) in enumerate(layers):
+            tables.append(
+                f"0\nLAYER\n5\n{0x10 + k:X}\n100\nAcDbSymbolTableRecord\n100\nAcDbLayerTableRecord\n2\n{name}\n70\n0"
+                f"\n62\n{_aci(color)}\n6\nCONTINUOUS"
+            )
+        tables.extend(["0\nENDTAB", "0\nENDSEC"])
+        entities = ["0\nSECTION\n2\nENTITIES"] + self.entities + ["0\nENDSEC", "0\nEOF"]
+        return "\n".join(header + tables + entities) + "\n"
+
+    def write(self, filename):
+        with open(filename, mode="wt", encoding="ascii", errors="replace") as f:
+            f.write(self.dumps())
+
+
+def export(svg, filename, layers, scale):
+    """export the paths and shapes of a document to a DXF file
+    `layers` is a list of pairs (layer name, stroke color) and `scale` is the
+    size of a user unit in mm. Return the number of entities written."""
+    # from user units to mm, with the y axis going up from the bottom of the page
+    x0, y0 = svg.get_viewbox()[:2]
+    page = inkex.Transform(scale=(scale, -scale)) @ inkex.Transform(translate=(-x0, -y0 - svg.viewbox_height))
+    stylesheets = bool(svg.xpath("//svg:style"))
+    writer = Writer(layers)
+    for child in svg:
+        for elem, transform, stroke in _shapes(child, page, None, stylesheets):
+            layer = writer.layer(stroke)
+            if isinstance(elem, inkex.Rectangle) and not utils.is_rounded(elem):
+                x, y, w, h = elem.left, elem.top, elem.width, elem.height
+                corners = [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
+                writer.polyline(layer, _apply(transform, corners), closed=True)
+            else:
+                writer.add_path(layer, elem.path.to_superpath(), transform)
+    writer.write(filename)
+    return writer.counter
@@ -1,14 +1,27 @@
 #!/usr/bin/env python
 
+import json
+import os
 import time
+from copy import deepcopy
 from gettext import gettext as _
 from gettext import ngettext
-from tempfile import TemporaryDirectory
 
 import inkex
 from inkex.paths import Line, Move
+from lxml import etree
 
-from lib import config, i18n, utils
+try:
+    from inkex.elements._parser import NodeBasedLookup
+except ImportError:  # inkex < 1.2
+    from inkex.elements._base import NodeBasedLookup
+
+from lib import cache, config, geometry, i18n, profiler, spatial, utils
+
+# NOTE: each extension is run in a new python process, and the modules that
+# are only needed by some of them (hashlib, concurrent.futures, lib.shell) are
+# imported when they are first used, to keep the start up fast (see
+# benchmark/startup.py)
 
 ARTIFACT_CLASS = "artifact"
 ARTIFACT_LAYER_ID = "ArtifactLayer"
@@ -18,6 +31,11 @@ ARTIFACT_OVERLAY_ID = "ArtifactOverlay"
 ARTIFACT_OVERLAY_BORDER_ID = "ArtifactOverlayBorder"
 ARTIFACT_OVERLAY_PATTERN_ID = "ArtifactOverlayPattern"
 
+# outcomes of incremental diagnostics are kept in the document's metadata
+OUTCOMES_ID = "DynalabOutcomes"
+OUTCOMES_NS = "https://github.com/phyver/dynalab_ext"
+OUTCOMES_VERSION = 4  # should be changed when the diagnostics change
+
 # error levels
 OK = 0
 NOTE = 1
@@ -40,12 +58,24 @@ def _skip_meta(elem):
     )
 
 
+def _transform(elem):
+    """return the transform of an element
+    Contrary to elem.transform, this doesn't rewrite the transform attribute
+    (which is slow and loses precision)."""
+    return inkex.Transform(elem.attrib.get("transform"))
+
+
 def _iter_elements(
     elem,  # current element
     skip_groups=False,  # should we return group elements
     skip_artifacts=True,  # should we skip artifacts?
+    transform=None,  # composed transform of the parent
+    transforms=None,  # dictionary where composed transforms are recorded
 ):
-    """recursively iterates over elements"""
+    """recursively iterates over elements
+    If a `transforms` dictionary is given, the composed transform of the
+    elements are computed along the way (from the composed transform of the
+    parent) and recorded in it."""
     # skip artifacts
     if skip_artifacts and elem.get("class") == ARTIFACT_CLASS:
         return
@@ -54,6 +84,11 @@ def _iter_elements(
     if _skip_meta(elem):
         return
 
+    if transforms is not None:
+        if "transform" in elem.attrib:
+            transform = transform @ _transform(elem)
+        transforms[elem] = transform
+
     # return visual elements (those that are not a group)
     # or the group itself if "skip_group" is false
     if not isinstance(elem, inkex.Group) or not skip_groups:
@@ -62,7 +97,102 @@ def _iter_elements(
     if isinstance(elem, inkex.Group):
         # recurse into groups
         for e in elem:
-            yield from _iter_elements(e, skip_groups=skip_groups, skip_artifacts=skip_artifacts)
+            yield from _iter_elements(
+                e, skip_groups=skip_groups, skip_artifacts=skip_artifacts, transform=transform, transforms=transforms
+            )
+
+
+def _empty(elem):
+    """remove the attributes and text of an element that was streamed
+    Its id is kept, so that clones can still find it, and so are its
+    children (which have already been emptied)."""
+    for key in [key for key in elem.attrib if key != "id"]:
+        del elem.attrib[key]
+    elem.text = elem.tail = None
+
+
+def _clip_bounding_box(elem, transform):
+    """return the bounding box of the region the clip path and mask of a
+    group restrict it to, or None if it is not restricted
+    `transform` is the composed transform of the group. Clip paths and masks
+    whose content is relative to the bounding box of the group are ignored."""
+    bb = None
+    for clip, units in ((elem.clip, "clipPathUnits"), (elem.get_computed_style("mask"), "maskContentUnits")):
+        if clip is None or clip.get(units) == "objectBoundingBox":
+            continue
+        clip_bb = clip.bounding_box(transform)
+        if clip_bb is not None:
+            bb = clip_bb if bb is None else bb & clip_bb
+    return bb
+
+
+def _counters(diag):
+    """return the counters of a diagnostic, ie its attributes whose name
+    starts with "counter" (this is a convention followed by all diagnostics)"""
+    return {k: v for k, v in vars(diag).items() if k.startswith("counter")}
+
+
+def _element_artifact_ids(id):
+    """return the ids of the artifacts that can be created for the element
+    with the given id (see `outline_bounding_box` and `outline_arrow`)"""
+    return (f"{ARTIFACT_CLASS}_boundingbox_{id}", f"{ARTIFACT_CLASS}_arrow_{id}")
+
+
+def _reduced_document(svg, elements):
+    """create a stripped copy of the document containing only the given elements
+    The elements are copied together with their ancestors (without their other
+    children) so that they keep their transforms and inherited styles. The
+    definitions, stylesheets and elements referenced by the given elements
+    (for example, the path of a text along a path) are copied as well."""
+    root = etree.Element(svg.tag, svg.attrib, nsmap=svg.nsmap)
+    copies = {svg: root}  # copies of original elements
+    shallow = set()  # elements that were copied without their children
+
+    def add(elem, deep):
+        if elem in copies and (not deep or elem not in shallow):
+            return
+        if elem in copies:
+            # replace the shallow copy of an ancestor by a full copy
+            c = deepcopy(elem)
+            copies[elem].getparent().replace(copies[elem], c)
+        else:
+            parent = elem.getparent()
+            add(parent, deep=False)
+            c = deepcopy(elem) if deep else etree.Element(elem.tag, elem.attrib)
+            copies[parent].append(c)
+
+        if not deep:
+            copies[elem] = c
+            shallow.add(elem)
+            return
+
+        copies.update(zip(elem.iter(), c.iter()))
+        shallow.difference_update(elem.iter())
+        # add the referenced elements
+        for e in elem.iter():
+            href = e.get("xlink:href") or e.get("href")
+            if href and href.startswith("#"):
+                ref = svg.getElementById(href[1:])
+                if ref is not None:
+                    add(ref, deep=True)
+
+    for elem in svg:
+        if isinstance(elem, (inkex.Defs, inkex.Style)):
+            add(elem, deep=True)
+    for elem in elements:
+        add(elem, deep=True)
+    return root
+
+
+def _query_all(svg):
+    """run the external inkscape command on a document and return its raw output
+    This doesn't use the document's elements (only the serialized document,
+    if given as bytes) and can thus run in a separate thread."""
+    from lib import shell
+
+    with shell.temporary_directory() as tmpdir:
+        svg_file = inkex.command.write_svg(svg, tmpdir, "input.svg")
+        return shell.query_all(svg_file)
 
 
 class Ext(inkex.EffectExtension, config.Ext, i18n.Ext):
@@ -72,13 +202,29 @@ class Ext(inkex.EffectExtension, config.Ext, i18n.Ext):
         i18n.Ext.__init__(self)
         config.Ext.__init__(self)
         self.reset_artifacts = reset_artifacts
-        self._time = {}
-        self.set_timer("init")
+        self.profiler = profiler.Profiler()
         self.BB = {}
+        self.groups_BB = {}  # bounding boxes of groups, indexed by their id
+        self.shapes_BB = {}  # bounding boxes of paths and shapes computed in batch, indexed by element
+        self.spatial_index = spatial.SpatialIndex()  # index of the elements' bounding boxes (see element_index)
+        self.transforms = {}  # composed transforms, indexed by element (see composed_transform)
+        self.BB_cache = cache.BBCache()
+        self.BB_query = None  # background query for self.BB (see prefetch_inkscape_bboxes)
+        self.messages = None  # buffered messages (see run_diagnostics)
+        self.artifacts = {}  # artifacts, indexed by their id
+        self.overlay_boxes = {}  # bounding boxes added to the overlay, indexed by element id (see run_diagnostics)
+        self.findings = None  # list of (level, id, message) replacing the artifacts (see stream_diagnostics)
         # if self.name:
         #     # FIXME: is there a better way to do that?
         #     type(self).__name__ = _(type(self).__name__)
 
+    def clean_up(self):
+        """save the bounding boxes cache at the end of the extension, and
+        show / dump the profiling information"""
+        self.BB_cache.save()
+        self.show_profile()
+        super().clean_up()
+
     ################
     # misc methods #
     def mm_to_svg(self, d):
@@ -95,7 +241,18 @@ class Ext(inkex.EffectExtension, config.Ext, i18n.Ext):
         setting is greater or equal to `verbosity`."""
         if verbosity > self.config.get("verbosity", 1):
             return
-        self.msg(sep.join(str(a) for a in args if a is not None) + end)
+        text = sep.join(str(a) for a in args if a is not None) + end
+        if self.messages is not None:
+            self.messages.append(text)
+        else:
+            self.msg(text)
+
+    def flush_messages(self):
+        """display the buffered messages, and stop buffering them
+        Messages are buffered when self.messages is a list."""
+        messages, self.messages = self.messages, None
+        for text in messages or ():
+            self.msg(text)
 
     def abort(self, *args, header=None, end="\n", sep=" "):
         """abort the extension by raising the appropriate exception"""
@@ -103,20 +260,69 @@ class Ext(inkex.EffectExtension, config.Ext, i18n.Ext):
             header = "Error encountered while running extension, aborting.\n\ndetails:\n"
         raise inkex.AbortExtension(header + sep.join(str(a) for a in args if a is not None) + end)
 
-    def get_timer(self, name="init"):
-        """return the running time (in milliseconds) since the last call to set_timer(name)"""
-        return 1000 * (time.perf_counter() - self._time[name])
+    #############
+    # profiling #
+    def span(self, name, category="dynalab", **args):
+        """return a timing span, to be used in a `with` statement
+        The duration of the span (in milliseconds) is available afterward as
+        span.duration."""
+        return self.profiler.span(name, category=category, **args)
+
+    def count(self, name, n=1):
+        """increment a profiling counter"""
+        self.profiler.count(name, n)
+
+    def running_time(self):
+        """return the running time (in milliseconds) of the extension"""
+        return self.profiler.elapsed()
+
+    def show_profile(self):
+        """show the aggregated spans and counters (with verbosity 4) and dump
+        the Chrome trace if the DYNALAB_TRACE environment variable gives a
+        filename"""
+        for category, name, n, duration in self.profiler.totals():
+            self.message(">>>", f"{category}: {name}: {n} x, {duration:.0f}ms", verbosity=4)
+        for name, value in self.profiler.counters.items():
+            self.message(">>>", f"{name}: {value}", verbosity=4)
+        filename = os.environ.get(profiler.TRACE_FILE_VARIABLE)
+        if filename:
+            try:
+                self.profiler.dump(filename)
+            except OSError as err:
+                self.message(f"cannot write trace to {filename}: {err}")
+
+    def composed_transform(self, elem):
+        """return the composed transform of an element
+        This is the same as elem.composed_transform(), but the transforms are
+        memoized in self.transforms so that each transform is only multiplied
+        once, even in deep hierarchies. The iterators (all_elements and
+        selected_or_all) fill the dictionary as they go down the document.
+        NOTE: if an element is moved in the document, the dictionary should
+        be updated or cleared.
+        """
+        transform = self.transforms.get(elem)
+        if transform is None:
+            parent = elem.getparent()
+            if isinstance(parent, inkex.BaseElement):
+                transform = self.composed_transform(parent)
+                if "transform" in elem.attrib:
+                    transform = transform @ _transform(elem)
+            else:
+                transform = _transform(elem)
+            self.transforms[elem] = transform
+        return transform
 
-    def set_timer(self, s):
-        """record the current time for easy timing"""
-        self._time[s] = time.perf_counter()
+    def all_elements(self, skip_groups=False):
+        """iterates over all the elements of the document"""
+        transform = self.composed_transform(self.svg)
+        for elem in self.svg:
+            yield from _iter_elements(elem, skip_groups=skip_groups, transform=transform, transforms=self.transforms)
 
     def selected_or_all(self, skip_groups=False):
         """iterates over the selected elements (recursively if needs be), or
         all the element if the selection is empty"""
         if not self.svg.selected:
-            for elem in self.svg:
-                yield from _iter_elements(elem, skip_groups=skip_groups)
+            yield from self.all_elements(skip_groups=skip_groups)
         else:
             for elem in self.svg.selected:
                 parent = elem.getparent()
@@ -125,69 +331,506 @@ class Ext(inkex.EffectExtension, config.Ext, i18n.Ext):
                     # error layer, which is removed before running a new
                     # extension
                     continue
-                yield from _iter_elements(elem, skip_groups=skip_groups)
+                yield from _iter_elements(
+                    elem,
+                    skip_groups=skip_groups,
+                    transform=self.composed_transform(parent),
+                    transforms=self.transforms,
+                )
+
+    def run_diagnostics(self, diagnostics, incremental=False):
+        """run several diagnostics with a single traversal of the document
+        Each element is dispatched to all the diagnostics that are interested
+        in it. The diagnostics share the bounding boxes and artifacts
+        dictionaries, and the artifacts are only reset by the first one.
+        If `incremental` is true, the outcome of the diagnostics for each
+        element is recorded in the document, together with a fingerprint of
+        the element. On the next run, the elements whose fingerprint didn't
+        change are not diagnosed again, and their artifacts are kept. (This
+        is only done on the whole document, when all the diagnostics are
+        incremental, see `Diagnostic.incremental`.)
+        """
+        incremental = incremental and not self.svg.selected and all(diag.incremental for diag in diagnostics)
+        if incremental:
+            signature = self.diagnostics_signature(diagnostics)
+            previous = self.load_outcomes(signature)
+            # the previous artifacts are looked up before the artifact
+            # layer is reset
+            layer = self.svg.getElementById(ARTIFACT_LAYER_ID)
+            old_artifacts = {} if layer is None else {e.get("id"): e for e in layer.iter()}
+            outcomes = {}
+            contexts = {}  # see cache.element_context
+            contents = {}  # see cache.element_content
+
+        if any(diag.may_need_inkscape_bboxes() for diag in diagnostics):
+            with self.span("prefetch_inkscape_bboxes"):
+                self.prefetch_inkscape_bboxes()
+
+        for i, diag in enumerate(diagnostics):
+            diag.reset_artifacts = i == 0
+            diag.options = self.options
+            diag.document = self.document
+            diag.svg = self.svg
+            diag.BB = self.BB
+            diag.groups_BB = self.groups_BB
+            diag.shapes_BB = self.shapes_BB
+            diag.spatial_index = self.spatial_index
+            diag.transforms = self.transforms
+            diag.BB_cache = self.BB_cache
+            diag.BB_query = self.BB_query
+            diag.artifacts = self.artifacts
+            diag.overlay_boxes = self.overlay_boxes
+            diag.profiler = self.profiler
+            # the messages of the diagnostics are displayed together with
+            # their summary, instead of being interleaved
+            diag.messages = []
+            with self.span(type(diag).__name__, category="diagnostic", step="init"):
+                diag.init_artifact_layer()
+                diag.init_diagnostic()
+
+        elements = list(self.selected_or_all(skip_groups=False))
+        if incremental:
+            fingerprints = {elem: cache.element_fingerprint(elem, contexts, contents) for elem in elements}
+        # the bounding boxes needed by several diagnostics are only computed once
+        if any(diag.batch_bounding_boxes for diag in diagnostics):
+            with self.span("compute_bounding_boxes"):
+                if incremental:
+                    # NOTE: the elements whose outcome will be restored are
+                    # skipped (if the restoration fails, their bounding
+                    # boxes are computed one at a time)
+                    self.compute_bounding_boxes(
+                        elem for elem in elements if previous.get(elem.get("id"), [None])[0] != fingerprints[elem]
+                    )
+                else:
+                    self.compute_bounding_boxes(elements)
+
+        # the time spent in each diagnostic during the traversal is
+        # accumulated, and recorded as arguments of the traversal span
+        times = [0] * len(diagnostics)
+        with self.span("traversal") as span:
+            counter = 0
+            for elem in elements:
+                counter += 1
+                if incremental:
+                    id = elem.get("id")
+                    fingerprint = fingerprints[elem]
+                    outcome = previous.get(id)
+                    if (
+                        outcome is not None
+                        and outcome[0] == fingerprint
+                        and diagnostics[0].restore_outcome(diagnostics, id, outcome, old_artifacts)
+                    ):
+                        outcomes[id] = outcome
+                        self.count("elements restored")
+                        continue
+                    deltas = {}
+                for i, diag in enumerate(diagnostics):
+                    if diag.accepts(elem):
+                        if incremental:
+                            before = _counters(diag)
+                        start = time.perf_counter()
+                        diag.diagnose(elem)
+                        times[i] += time.perf_counter() - start
+                        if incremental:
+                            delta = {k: v - before.get(k, 0) for k, v in _counters(diag).items()}
+                            delta = {k: d for k, d in delta.items() if d}
+                            if delta:
+                                deltas[type(diag).__name__] = delta
+                if incremental and id is not None:
+                    artifacts = [a for a in _element_artifact_ids(id) if a in self.artifacts]
+                    outcomes[id] = [fingerprint, deltas, self.overlay_boxes.get(id), artifacts]
+            self.count("elements visited", counter)
+            span.args.update((type(diag).__name__, f"{1000 * t:.0f}ms") for diag, t in zip(diagnostics, times))
+
+        for diag in diagnostics:
+            self.message(diag.name, verbosity=3)
+            diag.flush_messages()
+            with self.span(type(diag).__name__, category="diagnostic", step="finish"):
+                diag.finish_diagnostic()
+            self.message("", verbosity=1)
+
+        if incremental:
+            self.save_outcomes(signature, outcomes)
+
+        if diagnostics:
+            diagnostics[-1].clean_artifacts(force=False)
+
+    def stream_diagnostics(self, source, diagnostics):
+        """run several diagnostics on a document while it is parsed
+        This is a read-only mode for headless runs on very large documents,
+        which are never fully loaded in memory: the document is parsed with
+        lxml's iterparse, each element is given to the diagnostics as soon as
+        it is complete, and it is then emptied (only its id is kept). Only the
+        composed transforms of the ancestors of the current element are kept.
+        Only the "streamable" diagnostics are run (see
+        `Diagnostic.streamable`), and instead of creating artifacts, they
+        record their findings in self.findings, as tuples (level, id, message).
+        Clones whose reference comes later in the document are diagnosed at
+        the end.
+        """
+        for diag in diagnostics:
+            if not diag.streamable:
+                self.message(
+                    _("{extension:s}: skipped (needs the whole document)").format(extension=diag.name), verbosity=2
+                )
+        diagnostics = [diag for diag in diagnostics if diag.streamable]
+        self.findings = []
+
+        context = etree.iterparse(source, events=("start", "end"), huge_tree=True, remove_comments=True)
+        context.set_element_class_lookup(NodeBasedLookup())
+        # composed transforms of the ancestors of the current element (None
+        # for elements that are not diagnosed, like metadata or artifacts)
+        stack = []
+        deferred = []  # clones whose reference wasn't parsed yet
+        with self.span("streaming traversal"):
+            counter = 0
+            for event, elem in context:
+                if event == "start":
+                    if not stack:
+                        # root element: its attributes are enough to convert units
+                        self.svg = elem
+                        self.transforms[elem] = _transform(elem)
+                        stack.append(self.transforms[elem])
+                        for diag in diagnostics:
+                            diag.options = self.options
+                            diag.svg = self.svg
+                            diag.transforms = self.transforms
+                            diag.shapes_BB = self.shapes_BB
+                            diag.findings = self.findings
+                            diag.profiler = self.profiler
+                            diag.messages = []  # see run_diagnostics
+                            diag.init_diagnostic()
+                        continue
+                    # NOTE: inkex computes the ids of the document once, when
+                    # they are first needed (to find the reference of a
+                    # clone), so that the elements parsed later are added by hand
+                    id = elem.attrib.get("id")
+                    if id is not None:
+                        self.svg.ids[id] = elem
+                    # only the elements visited by `all_elements` are diagnosed
+                    transform = stack[-1]
+                    parent = elem.getparent()
+                    if (
+                        transform is None
+                        or not isinstance(parent, (inkex.Group, inkex.SvgDocumentElement))
+                        or _skip_meta(elem)
+                        or elem.get("class") == ARTIFACT_CLASS
+                    ):
+                        transform = None
+                    elif "transform" in elem.attrib:
+                        transform = transform @ _transform(elem)
+                    if transform is not None:
+                        # NOTE: update the dictionary in place, as it is
+                        # shared with the diagnostics
+                        self.transforms[elem] = transform
+                    stack.append(transform)
+                    continue
+
+                transform = stack.pop()
+                if not stack:
+                    # end of the root element
+                    continue
+                if transform is not None:
+                    counter += 1
+                    if isinstance(elem, inkex.Use) and elem.href is None:
+                        deferred.append(elem)
+                        continue
+                    # NOTE: update the dictionary in place, as it is shared
+                    # with the diagnostics
+                    self.shapes_BB.clear()
+                    self.compute_bounding_boxes([elem])
+                    for diag in diagnostics:
+                        if diag.accepts(elem):
+                            diag.diagnose(elem)
+                    del self.transforms[elem]
+                _empty(elem)
+
+            for elem in deferred:
+                for diag in diagnostics:
+                    if diag.accepts(elem):
+                        diag.diagnose(elem)
+            self.count("elements visited", counter)
+            self.count("clones deferred", len(deferred))
+
+        for diag in diagnostics:
+            self.message(diag.name, verbosity=3)
+            diag.flush_messages()
+            with self.span(type(diag).__name__, category="diagnostic", step="finish"):
+                diag.finish_diagnostic()
+            self.message("", verbosity=1)
+
+    def diagnostics_signature(self, diagnostics):
+        """compute a hash of the diagnostics, options and configuration of an
+        incremental run (see `run_diagnostics`)
+        The outcomes of the previous run are only used if it had the same
+        signature."""
+        import hashlib
+
+        options = {k: v for k, v in vars(self.options).items() if k not in ("input_file", "output", "ids")}
+        page = [self.svg.get(a) for a in ("width", "height", "viewBox")]
+        names = [type(diag).__name__ for diag in diagnostics]
+        data = [OUTCOMES_VERSION, names, options, self.config, page]
+        return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+    def load_outcomes(self, signature):
+        """return the outcomes recorded by the previous incremental run,
+        indexed by element ids, or an empty dictionary if there are none, or
+        if they have a different signature
+        Each outcome is a list containing the fingerprint of the element
+        (see `cache.element_fingerprint`), the counters incremented by each
+        diagnostic, the bounding box added to the overlay (see
+        `outline_bounding_box`) and the ids of the artifacts of the element."""
+        elem = self.svg.getElementById(OUTCOMES_ID)
+        if elem is None:
+            return {}
+        try:
+            data = json.loads(elem.text or "")
+        except ValueError:
+            return {}
+        if data.get("signature") != signature:
+            return {}
+        return data.get("outcomes", {})
+
+    def save_outcomes(self, signature, outcomes):
+        """record the outcomes of an incremental run in the document's metadata"""
+        self.remove_outcomes()
+        elem = etree.SubElement(self.svg.metadata, f"{{{OUTCOMES_NS}}}outcomes", nsmap={"dynalab": OUTCOMES_NS})
+        elem.set("id", OUTCOMES_ID)
+        elem.text = json.dumps({"signature": signature, "outcomes": outcomes}, separators=(",", ":"))
+
+    def remove_outcomes(self):
+        """remove the outcomes recorded by the previous incremental run"""
+        elem = self.svg.getElementById(OUTCOMES_ID)
+        if elem is not None:
+            elem.getparent().remove(elem)
+
+    def restore_outcome(self, diagnostics, id, outcome, old_artifacts):
+        """restore the outcome of the diagnostics for an element that didn't
+        change since the previous incremental run (see `run_diagnostics`)
+        The artifacts of the element are moved back from the previous
+        artifact layer, and the counters of the diagnostics are updated.
+        Return False (and restore nothing) if some of the artifacts are
+        missing, for example because the user deleted them: the element must
+        then be diagnosed again."""
+        _, deltas, bb, artifact_ids = outcome
+        if any(a not in old_artifacts for a in artifact_ids):
+            return False
+        for diag in diagnostics:
+            for k, d in deltas.get(type(diag).__name__, {}).items():
+                setattr(diag, k, getattr(diag, k) + d)
+        for artifact_id in artifact_ids:
+            artifact = old_artifacts[artifact_id]
+            self.artifact_group.add(artifact)
+            self.artifacts[artifact_id] = artifact
+        if bb is not None:
+            self.update_overlay(inkex.BoundingBox.new_xywh(*bb) if bb else inkex.BoundingBox())
+        return True
 
     ############################
     # computing bounding boxes #
-    def get_all_inkscape_bboxes(self):
+    def get_all_inkscape_bboxes(self, elements=None):
         """computes a dictionary indexed by ids containing all bounding boxes
         It is similar to inkex' get_inkscape_bbox method for text elements but
-        uses the "--query-all" flag to get all bounding boxes with a single
+        uses the "query-all" action to get all bounding boxes with a single
         inkscape invocation. We thus don't have to call the external inkscape
-        more than once.
+        more than once. The query is sent to the inkscape shell shared by the
+        whole extension (see `shell.InkscapeShell`).
+        If a list of elements is given, the external inkscape command only
+        gets a stripped document containing those elements (see
+        `_reduced_document`), which is much faster for big documents.
         """
+        if elements is None:
+            svg = self.svg.root
+        else:
+            svg = etree.tostring(_reduced_document(self.svg.root, elements))
+        self.count("external inkscape commands")
+        return self.parse_inkscape_bboxes(_query_all(svg))
+
+    def parse_inkscape_bboxes(self, out):
+        """computes a dictionary indexed by ids from the output of the "query-all" action"""
         BB = {}
-        with TemporaryDirectory(prefix="inkscape-command") as tmpdir:
-            svg_file = inkex.command.write_svg(self.svg.root, tmpdir, "input.svg")
-            out = inkex.command.inkscape(svg_file, "--query-all").splitlines()
-            for line in out:
-                try:
-                    id, x, y, w, h = line.split(",")
-                    x = self.svg.viewport_to_unit(x)
-                    y = self.svg.viewport_to_unit(y)
-                    w = self.svg.viewport_to_unit(w)
-                    h = self.svg.viewport_to_unit(h)
-                    BB[id] = inkex.BoundingBox.new_xywh(x, y, w, h)
-                except ValueError:
-                    # the output may contain empty lines!
-                    pass
+        for line in out.splitlines():
+            try:
+                id, x, y, w, h = line.split(",")
+                x = self.svg.viewport_to_unit(x)
+                y = self.svg.viewport_to_unit(y)
+                w = self.svg.viewport_to_unit(w)
+                h = self.svg.viewport_to_unit(h)
+                BB[id] = inkex.BoundingBox.new_xywh(x, y, w, h)
+            except ValueError:
+                # the output may contain empty lines!
+                pass
         return BB
 
+    def elements_without_bounding_box(self):
+        """return the elements whose bounding box can neither be computed, nor
+        found in the persistent cache"""
+        return [
+            e
+            for e in self.all_elements(skip_groups=True)
+            if not utils.has_bounding_box(e)
+            and self.BB_cache.get(cache.element_key(e, self.composed_transform(e))) is None
+        ]
+
+    def prefetch_inkscape_bboxes(self):
+        """start the external inkscape command in the background if some
+        bounding boxes will have to be retrieved
+        The reduced document is prepared here, but the external command is run
+        in a separate thread, so that the diagnostics can proceed in the
+        meantime. The `bounding_box` method only waits for the result when
+        such a bounding box is actually needed.
+        """
+        elements = self.elements_without_bounding_box()
+        if not elements:
+            return
+        self.message(">>>", _("calling external inkscape command to retrieve bounding boxes"), verbosity=4)
+        svg = etree.tostring(_reduced_document(self.svg.root, elements))
+
+        def query():
+            with self.span("inkscape query", category="subprocess", background=True):
+                return _query_all(svg)
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.count("external inkscape commands")
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.BB_query = executor.submit(query)
+        executor.shutdown(wait=False)
+
+    def compute_bounding_boxes(self, elements):
+        """compute the bounding boxes of many paths and shapes at once
+        This uses numpy (see `geometry.bounding_boxes`) and is much faster than
+        computing them one at a time for documents with many objects. The
+        bounding boxes are kept in self.shapes_BB and used by the
+        `bounding_box` method.
+        """
+        elements = [e for e in elements if utils.is_path(e) and e not in self.shapes_BB]
+        transforms = [self.composed_transform(e) for e in elements]
+        # NOTE: update the dictionary in place, as it may be shared between
+        # several diagnostics (see the `run_diagnostics` method)
+        self.shapes_BB.update(geometry.bounding_boxes(elements, transforms))
+
+    def element_index(self):
+        """return a spatial index of the bounding boxes of the selected (or
+        all) elements, excluding groups
+        The index is only built the first time it is needed, and is shared
+        between diagnostics (see `run_diagnostics`). Its keys are the
+        elements. See `spatial.SpatialIndex` for the available queries."""
+        if not self.spatial_index.built:
+            with self.span("build spatial index"):
+                elements = list(self.selected_or_all(skip_groups=True))
+                self.compute_bounding_boxes(elements)
+                # NOTE: the index is built in place, as it may be shared
+                # between several diagnostics
+                self.spatial_index.build((elem, self.bounding_box(elem)) for elem in elements)
+        return self.spatial_index
+
     def bounding_box(self, elem):
         """get the bounding box of an SVG object
         If the bounding box is not easy to compute (typically, for a text element),
         the get_all_inkscape_bboxes is used to ask the external inkscape command for
         all bounding boxes. They are then kept in a dictionnary so that later calls
-        to the method are faster.
+        to the method are faster, and in a persistent cache so that later runs
+        on the same elements don't need the external inkscape command.
+        The bounding box of a group (or layer) is computed from the bounding
+        boxes of its children, so that the external inkscape command is only
+        called if the group contains a text element. It is restricted to the
+        group's clip path and mask.
         """
 
-        # bounding boxes are kept in self.BB, indexed by the element's id
-        # check
+        # when streaming the document, only the bounding boxes of paths,
+        # shapes and images can be computed (see the `stream_diagnostics` method)
+        if self.findings is not None and not (utils.is_path(elem) or isinstance(elem, inkex.Image)):
+            return None
+
         k = elem.get_id()
-        if self.BB:
-            bb = self.BB.get(k, inkex.BoundingBox())
-            if bb is not None:
-                return bb
-            else:
-                self.abort(f"ERROR: cannot retrieve the bounding box for element with id '{k}'")
 
-        # if self.BB isn't defined, try computing the bounding box normally
-        bb = utils.bounding_box(elem, elem.getparent().composed_transform())
+        # bounding boxes of groups are kept in self.groups_BB, indexed by the
+        # element's id
+        if isinstance(elem, inkex.Group):
+            bb = self.groups_BB.get(k)
+            if bb is None:
+                bb = inkex.BoundingBox()
+                for child in elem:
+                    if not isinstance(child, inkex.ShapeElement) or _skip_meta(child):
+                        continue
+                    if child.get("class") == ARTIFACT_CLASS:
+                        continue
+                    bb += self.bounding_box(child)
+                # only the part of the group inside its clip path / mask is visible
+                clip_bb = _clip_bounding_box(elem, self.composed_transform(elem))
+                if clip_bb is not None and bb:
+                    bb &= clip_bb
+                self.groups_BB[k] = bb
+            return bb
+
+        # the bounding boxes of paths and shapes may have been computed in
+        # batch (see the `compute_bounding_boxes` method)
+        bb = self.shapes_BB.get(elem)
         if bb is not None:
             return bb
-        else:
-            # we only call get_all_inkscape_bboxes when this computation failed
-            self.set_timer("get_bb")  # start timer
-            self.message(">>>", _("calling external inkscape command to retrieve bounding boxes"), verbosity=4)
-            self.BB = self.get_all_inkscape_bboxes()
-            self.message(
-                ">>>",
-                _("running time for external inkscape command: {time:.0f}ms").format(time=self.get_timer("get_bb")),
-                verbosity=4,
-            )
-            bb = self.BB.get(k, inkex.BoundingBox())
+
+        # try computing the bounding box normally
+        bb = utils.bounding_box(elem, self.composed_transform(elem.getparent()))
+        if bb is not None:
             return bb
 
+        # when this computation failed, look for the bounding box in the
+        # persistent cache, or in self.BB (indexed by the element's id)
+        key = cache.element_key(elem, self.composed_transform(elem))
+        bb = self.BB_cache.get(key)
+        if bb is None:
+            if k not in self.BB:
+                self.query_inkscape_bboxes()
+                self.BB.setdefault(k, None)
+            bb = self.BB[k]
+            if bb is None:
+                # NOTE: failures are not kept in the persistent cache, the
+                # external inkscape command will be called again next time
+                return inkex.BoundingBox()
+            self.BB_cache.set(key, bb)
+        return bb
+
+    def query_inkscape_bboxes(self):
+        """retrieve the bounding boxes that can neither be computed nor found
+        in the persistent cache from the external inkscape command, and put
+        them in self.BB
+        The result of the background query is used first (see
+        `prefetch_inkscape_bboxes`). If it failed, or if some bounding boxes
+        are still missing, the external inkscape command is called (once) for
+        the missing elements. The elements that inkscape couldn't give a
+        bounding box for are recorded with None."""
+        # NOTE: update the dictionary in place, as it may be shared between
+        # several diagnostics (see the `run_diagnostics` method)
+        if self.BB_query is not None and not self.BB:
+            # the external inkscape command was started in the background, we
+            # only wait for its result
+            try:
+                with self.span("waiting for inkscape query", category="subprocess") as span:
+                    self.BB.update(self.parse_inkscape_bboxes(self.BB_query.result()))
+                self.message(
+                    ">>>",
+                    _("running time for external inkscape command: {time:.0f}ms").format(time=span.duration),
+                    verbosity=4,
+                )
+            except (inkex.command.ProgramRunError, OSError) as e:
+                self.message(">>>", _("external inkscape command failed: {error}").format(error=e), verbosity=4)
+        # we only call get_all_inkscape_bboxes for the elements whose
+        # bounding box can neither be computed, nor found in the cache
+        elements = [e for e in self.elements_without_bounding_box() if e.get_id() not in self.BB]
+        if not elements:
+            return
+        self.message(">>>", _("calling external inkscape command to retrieve bounding boxes"), verbosity=4)
+        with self.span("inkscape query", category="subprocess") as span:
+            self.BB.update(self.get_all_inkscape_bboxes(elements))
+        self.message(
+            ">>>",
+            _("running time for external inkscape command: {time:.0f}ms").format(time=span.duration),
+            verbosity=4,
+        )
+        for elem in elements:
+            self.BB.setdefault(elem.get_id(), None)
+
     #############################
     # dealing with artifacts... #
     def init_artifact_layer(self):
@@ -207,14 +850,18 @@ class Ext(inkex.EffectExtension, config.Ext, i18n.Ext):
         # re-initialise existing artifact layer / group
         artifact_layer = svg.getElementById(ARTIFACT_LAYER_ID)
         artifact_group = svg.getElementById(ARTIFACT_GROUP_ID)
+        # NOTE: the layer / group are not cleared before being removed, so
+        # that inkex forgets the ids of all the old artifacts
         if artifact_group is not None and self.reset_artifacts:
-            artifact_group.clear()
             artifact_group.getparent().remove(artifact_group)
             artifact_group = None
         if artifact_layer is not None and self.reset_artifacts:
-            artifact_layer.clear()
             artifact_layer.getparent().remove(artifact_layer)
             artifact_layer = None
+        # the outcomes of a previous incremental run don't correspond to the
+        # artifacts anymore (see `run_diagnostics`)
+        if self.reset_artifacts:
+            self.remove_outcomes()
 
         # Create a new layer (this is just a special SVG group)
         if artifact_layer is None:
@@ -239,6 +886,16 @@ class Ext(inkex.EffectExtension, config.Ext, i18n.Ext):
 
         assert self.artifact_group is not None
 
+        # index existing artifacts by id, so that we don't need to look for
+        # them in the whole document
+        # NOTE: the dictionary is cleared in place, as it may be shared
+        # between several diagnostics (see the `run_diagnostics` method)
+        self.artifacts.clear()
+        for elem in artifact_layer.iter():
+            id = elem.get("id")
+            if id is not None:
+                self.artifacts[id] = elem
+
         # define the arrow markers
         if svg.getElementById("ErrorArrowheadMarker") is None:
             self._new_marker("ErrorArrowheadMarker", ERROR_COLOR)
@@ -277,12 +934,15 @@ class Ext(inkex.EffectExtension, config.Ext, i18n.Ext):
         if artifact_overlay is not None and force:
             artifact_overlay.getparent().remove(artifact_overlay)
 
+        # the outcomes of incremental diagnostics refer to the artifacts
+        # (see `run_diagnostics`)
+        if force:
+            self.remove_outcomes()
+
         if artifact_group is not None and (force or len(artifact_group) == 0):
-            artifact_group.clear()
             artifact_group.getparent().remove(artifact_group)
 
         if artifact_layer is not None and (force or len(artifact_layer) == 0):
-            artifact_layer.clear()
             artifact_layer.getparent().remove(artifact_layer)
 
         if force or len(artifact_layer) == 0:
@@ -322,11 +982,13 @@ class Ext(inkex.EffectExtension, config.Ext, i18n.Ext):
                     _("object with id={id} was moved out of the artifact layer").format(id=elem.get_id()),
                     verbosity=2,
                 )
-                tr = elem.getparent().composed_transform()
+                tr = self.composed_transform(elem.getparent())
                 elem.getparent().remove(elem)
                 elem.transform = tr @ elem.transform
                 self.svg.add(elem)
             if counter > 0:
+                # the composed transforms of the moved elements have changed
+                self.transforms.clear()
                 self.message(
                     ngettext(
                         "{counter} object was moved out of the artifact layer",
@@ -339,7 +1001,7 @@ class Ext(inkex.EffectExtension, config.Ext, i18n.Ext):
     def update_overlay(self, bb):
         if self.config["artifacts_overlay_opacity"] == 0:
             return
-        rect = self.svg.getElementById(ARTIFACT_OVERLAY_ID)
+        rect = self.artifacts.get(ARTIFACT_OVERLAY_ID)
         if rect is None:
             w = self.svg.unittouu(self.svg.viewport_width)
             h = self.svg.unittouu(self.svg.viewport_height)
@@ -376,7 +1038,10 @@ class Ext(inkex.EffectExtension, config.Ext, i18n.Ext):
             )
             g.add(border)
 
-        border = self.svg.getElementById(ARTIFACT_OVERLAY_BORDER_ID)
+            self.artifacts[ARTIFACT_OVERLAY_ID] = rect
+            self.artifacts[ARTIFACT_OVERLAY_BORDER_ID] = border
+
+        border = self.artifacts.get(ARTIFACT_OVERLAY_BORDER_ID)
 
         if bb is not None:
             bb = bb + rect.shape_box()
@@ -402,6 +1067,11 @@ class Ext(inkex.EffectExtension, config.Ext, i18n.Ext):
         if elem is None and bb is None:
             self.abort("ERROR: method `outline_bounding_box` needs either an SVG element or an explicit bounding box")
 
+        if self.findings is not None:
+            # read-only mode (see the `stream_diagnostics` method)
+            self.findings.append((level, None if elem is None else elem.get("id"), msg))
+            return
+
         if elem is None:
             id = self.svg.get_unique_id("artifact_bb")
         else:
@@ -413,9 +1083,13 @@ class Ext(inkex.EffectExtension, config.Ext, i18n.Ext):
         self.__new_artifact_bb(level, bb, id=id, msg=msg, margin=margin, **style)
         if level > NOTE:
             self.update_overlay(bb)
+            if elem is not None:
+                # NOTE: update the dictionary in place, as it may be shared
+                # between several diagnostics (see the `run_diagnostics` method)
+                self.overlay_boxes[elem.get("id")] = [bb.left, bb.top, bb.width, bb.height] if bb else []
 
     def __new_artifact_bb(self, level, bb, id, msg=None, margin=1, **style):
-        rect = self.svg.getElementById(id)
+        rect = self.artifacts.get(id)
         if rect is None:
             margin = self.mm_to_svg(margin)
             x, y = bb.left, bb.top
@@ -428,6 +1102,7 @@ class Ext(inkex.EffectExtension, config.Ext, i18n.Ext):
                     "error-level": "-1",  # custom style attribute
                 }
             )
+            self.artifacts[id] = rect
 
         # add the message in the description
         if msg is not None:
@@ -439,34 +1114,44 @@ class Ext(inkex.EffectExtension, config.Ext, i18n.Ext):
             # existing bounding box has higher error-level: keep existing style
             return
 
-        rect.style["error-level"] = str(level)
-        rect.style["fill"] = "none"
-        rect.style["stroke-opacity"] = self.config["artifacts_opacity"] / 100
-        rect.style["stroke-width"] = self.config["artifacts_stroke_width"]
+        # NOTE: the new style is computed before being set, because each
+        # modification of rect.style re-serializes the style attribute
+        rect_style = inkex.Style(rect.style)
+        rect_style["error-level"] = str(level)
+        rect_style["fill"] = "none"
+        rect_style["stroke-opacity"] = self.config["artifacts_opacity"] / 100
+        rect_style["stroke-width"] = self.config["artifacts_stroke_width"]
 
         if level == OK:
-            rect.style["stroke"] = NOTE_COLOR
-            rect.style["stroke-width"] = float(rect.style["stroke-width"]) / 2
+            rect_style["stroke"] = NOTE_COLOR
+            rect_style["stroke-width"] = float(rect_style["stroke-width"]) / 2
         elif level == NOTE:
-            rect.style["stroke"] = NOTE_COLOR
+            rect_style["stroke"] = NOTE_COLOR
         elif level == WARNING:
-            rect.style["stroke"] = WARNING_COLOR
+            rect_style["stroke"] = WARNING_COLOR
         elif level == ERROR:
-            rect.style["stroke"] = ERROR_COLOR
+            rect_style["stroke"] = ERROR_COLOR
         else:
             assert False
 
         for k in style:
-            rect.style[k.replace("_", "-")] = style[k]
-        self.artifact_group.add(rect)
+            rect_style[k.replace("_", "-")] = style[k]
 
         # convert stroke-width to actual mm
-        rect.style["stroke-width"] = self.mm_to_svg(rect.style["stroke-width"])
+        rect_style["stroke-width"] = self.mm_to_svg(rect_style["stroke-width"])
+        rect.style = rect_style
+        self.artifact_group.add(rect)
+        self.count("artifacts created")
 
     def outline_arrow(self, level, elem, p=None, msg=None, margin=1, **style):
         if elem is None and p is None:
             self.abort("ERROR: method `outline_arrow` needs either an SVG element or an explicit point")
 
+        if self.findings is not None:
+            # read-only mode (see the `stream_diagnostics` method)
+            self.findings.append((level, None if elem is None else elem.get("id"), msg))
+            return
+
         if p is None:
             bb = self.bounding_box(elem)
             p = (bb.left, bb.bottom)
@@ -487,7 +1172,7 @@ class Ext(inkex.EffectExtension, config.Ext, i18n.Ext):
         """add an artifact arrow in the error layer
         elem is the element the arrow should be pointing to
         """
-        arrow = self.svg.getElementById(id)
+        arrow = self.artifacts.get(id)
         if arrow is None:
             side = self.mm_to_svg(length)
             margin = self.mm_to_svg(margin)
@@ -500,6 +1185,7 @@ class Ext(inkex.EffectExtension, config.Ext, i18n.Ext):
                     "error-level": -1,  # custom style attribute
                 }
             )
+            self.artifacts[id] = arrow
 
         # add the message in the description
         if msg is not None:
@@ -511,36 +1197,40 @@ class Ext(inkex.EffectExtension, config.Ext, i18n.Ext):
             # existing arrow has higher error-level: keep existing style
             return
 
-        arrow.style["error-level"] = str(level)
-        arrow.style["fill"] = "none"
-        arrow.style["opacity"] = self.config["artifacts_opacity"] / 100
-        arrow.style["stroke-width"] = self.config["artifacts_stroke_width"]
+        # NOTE: the new style is computed before being set, because each
+        # modification of arrow.style re-serializes the style attribute
+        arrow_style = inkex.Style(arrow.style)
+        arrow_style["error-level"] = str(level)
+        arrow_style["fill"] = "none"
+        arrow_style["opacity"] = self.config["artifacts_opacity"] / 100
+        arrow_style["stroke-width"] = self.config["artifacts_stroke_width"]
 
         if level == OK:
-            arrow.style["stroke"] = NOTE_COLOR
-            arrow.style["stroke-width"] = float(arrow.style["stroke-width"]) / 2
-            arrow.style["marker-end"] = "url(#NoteArrowheadMarker)"
+            arrow_style["stroke"] = NOTE_COLOR
+            arrow_style["stroke-width"] = float(arrow_style["stroke-width"]) / 2
+            arrow_style["marker-end"] = "url(#NoteArrowheadMarker)"
         elif level == NOTE:
-            arrow.style["stroke"] = NOTE_COLOR
-            arrow.style["marker-end"] = "url(#NoteArrowheadMarker)"
+            arrow_style["stroke"] = NOTE_COLOR
+            arrow_style["marker-end"] = "url(#NoteArrowheadMarker)"
         elif level == WARNING:
-            arrow.style["stroke"] = WARNING_COLOR
-            arrow.style["marker-end"] = "url(#WarningArrowheadMarker)"
+            arrow_style["stroke"] = WARNING_COLOR
+            arrow_style["marker-end"] = "url(#WarningArrowheadMarker)"
         elif level == ERROR:
-            arrow.style["stroke"] = ERROR_COLOR
-            arrow.style["marker-end"] = "url(#ErrorArrowheadMarker)"
+            arrow_style["stroke"] = ERROR_COLOR
+            arrow_style["marker-end"] = "url(#ErrorArrowheadMarker)"
         else:
             assert False
 
         for k in style:
-            arrow.style[k.replace("_", "-")] = style[k]
-        self.artifact_group.add(arrow)
+            arrow_style[k.replace("_", "-")] = style[k]
+
+        # convert stroke-width to actual mm
+        arrow_style["stroke-width"] = self.mm_to_svg(arrow_style["stroke-width"])
+        arrow.style = arrow_style
 
         # Add the artifact to the error group (inside the error layer)
         self.artifact_group.add(arrow)
-
-        # convert stroke-width to actual mm
-        arrow.style["stroke-width"] = self.mm_to_svg(arrow.style["stroke-width"])
+        self.count("artifacts created")
 
     ###############################
     # misc initialisation methods #
@@ -569,4 +1259,91 @@ class Ext(inkex.EffectExtension, config.Ext, i18n.Ext):
         self.svg.defs.append(marker)
 
 
+class Diagnostic(Ext):
+    """base class for diagnostics looking at the elements one at a time
+    Subclasses should define the `diagnose` method, which is called on each
+    element of the selection, and may define `init_diagnostic` and
+    `finish_diagnostic`. The elements given to `diagnose` are filtered with
+    the `skip_groups` and `element_types` attributes.
+    This allows running several diagnostics with a single traversal of the
+    document (see `Ext.run_diagnostics`).
+    """
+
+    skip_groups = True  # should groups be given to `diagnose`?
+    element_types = None  # tuple of inkex classes given to `diagnose` (None for all)
+    # can the outcome of `diagnose` be reused when an element didn't change?
+    # (This requires that the outcome only depends on the element, that the
+    # artifacts are attached to the element, and that the diagnostic only
+    # records its results in attributes whose names start with "counter".)
+    incremental = False
+    # can the diagnostic be run while the document is parsed (see
+    # `Ext.stream_diagnostics`)? This requires that `diagnose` only looks at
+    # the element itself, and at the bounding boxes of paths, shapes and
+    # images (the `bounding_box` method returns None for other elements).
+    streamable = False
+    # does `diagnose` look at the bounding boxes of (almost) all the elements?
+    # They are then computed at once, before the traversal, and shared
+    # between the diagnostics (see `Ext.compute_bounding_boxes`).
+    batch_bounding_boxes = False
+
+    def accepts(self, elem):
+        """return true if the element should be given to the `diagnose` method"""
+        if self.skip_groups and isinstance(elem, inkex.Group):
+            return False
+        return self.element_types is None or isinstance(elem, self.element_types)
+
+    def may_need_inkscape_bboxes(self):
+        """return true if the diagnostic may look at elements whose bounding box
+        can only be retrieved with the external inkscape command (text
+        elements, possibly inside groups or clones)"""
+        if self.element_types is None:
+            return True
+        return any(issubclass(t, (inkex.TextElement, inkex.Use, inkex.Group)) for t in self.element_types)
+
+    def init_diagnostic(self):
+        """initialise the diagnostic (counters, options, etc.)"""
+        pass
+
+    def diagnose(self, elem):
+        """look at a single element, and create the corresponding artifacts"""
+        pass
+
+    def finish_diagnostic(self):
+        """finish the diagnostic after all elements have been looked at
+        This typically creates the remaining artifacts and displays a summary
+        message."""
+        pass
+
+    def effect(self, clean=True):
+        self.message(self.name, verbosity=3)
+        with self.span(type(self).__name__, category="diagnostic", step="init"):
+            self.init_artifact_layer()
+            self.init_diagnostic()
+
+        elements = list(self.selected_or_all(skip_groups=self.skip_groups))
+        if self.batch_bounding_boxes:
+            with self.span("compute_bounding_boxes"):
+                self.compute_bounding_boxes(elements)
+
+        with self.span("traversal"):
+            counter = 0
+            for elem in elements:
+                counter += 1
+                if self.accepts(elem):
+                    self.diagnose(elem)
+            self.count("elements visited", counter)
+
+        with self.span(type(self).__name__, category="diagnostic", step="finish"):
+            self.finish_diagnostic()
+
+        if clean:
+            self.clean_artifacts(force=False)
+
+        self.message(
+            _("{extension:s}: running time = {time:.0f}ms").format(extension=self.name, time=self.running_time()),
+            verbosity=3,
+        )
+        self.message("", verbosity=1)
+
+
 # vim: textwidth=120 foldmethod=indent foldlevel=0
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+
+import inkex
+
+from lib import utils
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Bounding boxes of many paths and shapes, computed at once with numpy.
+#
+# The geometry of the elements is collected into flat arrays:
+#   - cubic Bézier segments (4 control points each) for paths, polylines,
+#     polygons, lines and rounded rectangles,
+#   - 4 corners for (non rounded) rectangles,
+#   - center and radii for circles and ellipses,
+# together with the index of the element they belong to. The composed
+# transforms are applied to all the points with a few matrix products, and the
+# bounding boxes are obtained from the extrema of each segment / ellipse,
+# reduced per element.
+
+
+def _has_clip(elem):
+    """return true if the element is clipped (its bounding box then depends on the clip path)"""
+    return elem.get("clip-path", "none") != "none"
+
+
+def _transform(M, idx, x, y):
+    """apply the transforms M[idx] (as rows a, b, c, d, e, f) to the points (x, y)"""
+    a, b, c, d, e, f = M[idx].T
+    return a * x + c * y + e, b * x + d * y + f
+
+
+def _cubic_extrema(p0, p1, p2, p3):
+    """compute the minimum and maximum values of 1D cubic Bézier curves
+    The extrema are at the end points, or at the roots of the derivative,
+    which is a quadratic polynomial A t² + B t + C."""
+    A = -p0 + 3 * p1 - 3 * p2 + p3
+    B = 2 * (p0 - 2 * p1 + p2)
+    C = p1 - p0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        linear = np.abs(A) < 1e-12
+        delta = np.sqrt(B * B - 4 * A * C)  # NaN when there is no root
+        t1 = np.where(linear, -C / B, (-B + delta) / (2 * A))
+        t2 = np.where(linear, np.nan, (-B - delta) / (2 * A))
+    vmin = np.minimum(p0, p3)
+    vmax = np.maximum(p0, p3)
+    for t in (t1, t2):
+        t = np.where((t > 0) & (t < 1), t, np.nan)
+        s = 1 - t
+        v = s * s * s * p0 + 3 * s * s * t * p1 + 3 * s * t * t * p2 + t * t * t * p3
+        vmin = np.fmin(vmin, v)  # NaN values are ignored
+        vmax = np.fmax(vmax, v)
+    return vmin, vmax
+
+
+def bounding_boxes(elements, transforms):
+    """compute the bounding boxes of paths and shapes
+    `transforms` gives the composed transform of each element. The result is a dictionary indexed by
+    elements. Elements whose bounding box cannot be computed that way (texts,
+    images, clones, clipped objects, empty paths, ...) are absent from it.
+    This returns an empty dictionary if numpy isn't available.
+    """
+    if np is None:
+        return {}
+
+    elems = []  # elements handled
+    matrices = []  # transforms of those elements, as (a, b, c, d, e, f)
+    curves, curves_idx = [], []  # cubic segments as (x0, y0, x1, y1, x2, y2, x3, y3)
+    points, points_idx = [], []  # corners of rectangles
+    ellipses, ellipses_idx = [], []  # (cx, cy, rx, ry)
+
+    for elem, transform in zip(elements, transforms):
+        if not utils.is_path(elem) or _has_clip(elem):
+            continue
+        i = len(elems)
+        if isinstance(elem, (inkex.Circle, inkex.Ellipse)):
+            c = elem.center
+            rx, ry = elem.rxry()
+            ellipses.append((c.x, c.y, rx, ry))
+            ellipses_idx.append(i)
+        elif isinstance(elem, inkex.Rectangle) and not utils.is_rounded(elem):
+            x, y, w, h = elem.left, elem.top, elem.width, elem.height
+            points.extend(((x, y), (x + w, y), (x, y + h), (x + w, y + h)))
+            points_idx.extend((i, i, i, i))
+        else:
+            n = len(curves)
+            for sub in elem.path.to_superpath():
+                if len(sub) == 1:
+                    # a single point
+                    (x, y) = sub[0][1]
+                    curves.append((x, y, x, y, x, y, x, y))
+                for k0, k1 in zip(sub, sub[1:]):
+                    curves.append((*k0[1], *k0[2], *k1[0], *k1[1]))
+            if len(curves) == n:
+                continue  # empty path
+            curves_idx.extend([i] * (len(curves) - n))
+        elems.append(elem)
+        matrices.append((transform.a, transform.b, transform.c, transform.d, transform.e, transform.f))
+
+    if not elems:
+        return {}
+
+    M = np.array(matrices, dtype=float)
+    n = len(elems)
+    xmin = np.full(n, np.inf)
+    ymin = np.full(n, np.inf)
+    xmax = np.full(n, -np.inf)
+    ymax = np.full(n, -np.inf)
+
+    def reduce(idx, x0, y0, x1, y1):
+        np.minimum.at(xmin, idx, x0)
+        np.minimum.at(ymin, idx, y0)
+        np.maximum.at(xmax, idx, x1)
+        np.maximum.at(ymax, idx, y1)
+
+    if curves:
+        C = np.array(curves, dtype=float)
+        idx = np.array(curves_idx)
+        xs, ys = zip(*(_transform(M, idx, C[:, 2 * k], C[:, 2 * k + 1]) for k in range(4)))
+        x0, x1 = _cubic_extrema(*xs)
+        y0, y1 = _cubic_extrema(*ys)
+        reduce(idx, x0, y0, x1, y1)
+
+    if points:
+        P = np.array(points, dtype=float)
+        idx = np.array(points_idx)
+        x, y = _transform(M, idx, P[:, 0], P[:, 1])
+        reduce(idx, x, y, x, y)
+
+    if ellipses:
+        # the image of an ellipse by an affine transform is an ellipse, whose
+        # half width and height are given by the norms of the rows of the
+        # (scaled) linear part of the transform
+        E = np.array(ellipses, dtype=float)
+        idx = np.array(ellipses_idx)
+        a, b, c, d, _e, _f = M[idx].T
+        cx, cy = _transform(M, idx, E[:, 0], E[:, 1])
+        w = np.hypot(a * E[:, 2], c * E[:, 3])
+        h = np.hypot(b * E[:, 2], d * E[:, 3])
+        reduce(idx, cx - w, cy - h, cx + w, cy + h)
+
+    return {
+        elem: inkex.BoundingBox((x0, x1), (y0, y1))
+        for elem, x0, x1, y0, y1 in zip(elems, xmin.tolist(), xmax.tolist(), ymin.tolist(), ymax.tolist())
+    }
@@ -5,6 +5,8 @@ import os
 
 GETTEXT_DOMAIN = "dynalab"
 
+_bound = False  # has the domain been bound already? (see Ext)
+
 
 class Ext:
 
@@ -12,7 +14,13 @@ class Ext:
         super().__init__()
 
         # Set up gettext
+        # NOTE: this is only done once, even though several extensions are
+        # created by the batteries of diagnostics
+        global _bound
+        if _bound:
+            return
         locale_dir = os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "locales"))
         domain = GETTEXT_DOMAIN
         gettext.bindtextdomain(domain, locale_dir)
         gettext.textdomain(domain)
+        _bound = True
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+
+import json
+import os
+import threading
+import time
+
+TRACE_FILE_VARIABLE = "DYNALAB_TRACE"  # environment variable giving the trace file
+
+
+class Span:
+    """a timed section of code, used as a context manager (see `Profiler.span`)
+    The duration (in milliseconds) is available after the end of the span."""
+
+    def __init__(self, profiler, name, category, args):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+        self.args = args
+        self.parent = None  # enclosing span (in the same thread)
+        self.thread = None
+        self.start = None
+        self.duration = None
+
+    def __enter__(self):
+        stack = self.profiler._stack()
+        self.parent = stack[-1] if stack else None
+        self.thread = threading.get_ident()
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.duration = 1000 * (time.perf_counter() - self.start)
+        self.profiler._stack().pop()
+        self.profiler.spans.append(self)
+        return False
+
+
+class Profiler:
+    """record nested timing spans and counters
+    Spans can be nested (also in different threads) and are kept so that
+    they can be aggregated (see `totals`) or dumped as a Chrome trace (see
+    `chrome_trace`), which can be read with chrome://tracing or
+    https://ui.perfetto.dev.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans = []  # finished spans
+        self.counters = {}
+        self._local = threading.local()
+
+    def _stack(self):
+        """return the stack of current spans of the current thread"""
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def elapsed(self):
+        """return the running time (in milliseconds) since the creation of the profiler"""
+        return 1000 * (time.perf_counter() - self.start)
+
+    def span(self, name, category="dynalab", **args):
+        """return a new span, to be used in a `with` statement
+        Additional keyword arguments are recorded with the span."""
+        return Span(self, name, category, args)
+
+    def count(self, name, n=1):
+        """increment a counter"""
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def totals(self):
+        """aggregate the spans by category and name
+        The result is a list of (category, name, number of spans, total duration)."""
+        totals = {}
+        for span in self.spans:
+            k = (span.category, span.name)
+            n, d = totals.get(k, (0, 0))
+            totals[k] = (n + 1, d + span.duration)
+        return [(c, name, n, d) for (c, name), (n, d) in totals.items()]
+
+    def chrome_trace(self):
+        """return the spans and counters in the Chrome trace event format"""
+        pid = os.getpid()
+        events = []
+        for span in self.spans:
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": 1e6 * (span.start - self.start),
+                    "dur": 1000 * span.duration,
+                    "pid": pid,
+                    "tid": span.thread,
+                    "args": span.args,
+                }
+            )
+        for name, value in self.counters.items():
+            events.append(
+                {
+                    "name": name,
+                    "ph": "C",
+                    "ts": 1000 * self.elapsed(),
+                    "pid": pid,
+                    "args": {name: value},
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"counters": self.counters}}
+
+    def dump(self, filename):
+        """write the Chrome trace to a file"""
+        with open(filename, mode="wt") as f:
+            json.dump(self.chrome_trace(), f, default=str)
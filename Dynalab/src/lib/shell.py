@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+
+import atexit
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from tempfile import TemporaryDirectory, mkstemp
+
+import inkex
+
+PROMPT = "> "
+START_TIMEOUT = 60  # maximum time (in seconds) for inkscape to start
+QUERY_TIMEOUT = 120  # maximum time (in seconds) for a query
+EXPORT_TIMEOUT = 600  # maximum time (in seconds) for an export
+TMPFS_DIR = "/dev/shm"  # in memory filesystem, for the documents given to inkscape
+
+
+class ShellError(Exception):
+    """the inkscape shell crashed or didn't answer in time"""
+
+
+def _read(stream, output):
+    """read a stream and put its content in a queue, until the end of file
+    This is run in a separate thread so that we can use timeouts when
+    waiting for inkscape's answer."""
+    try:
+        while True:
+            data = os.read(stream.fileno(), 4096)
+            if not data:
+                break
+            output.put(data)
+    except (OSError, ValueError):
+        pass  # the stream was closed by `InkscapeShell.stop`
+    output.put(None)
+
+
+class InkscapeShell:
+    """a long lived "inkscape --shell" process
+    Starting inkscape takes a few seconds, so a single process is used for all
+    the queries and exports of an extension. Commands are sequences of inkscape
+    actions sent on the process's standard input, and their answer is everything
+    inkscape prints before its next prompt.
+    If the process crashes or doesn't answer in time, it is killed and
+    restarted. If it cannot be started at all, the shell is marked as broken and
+    the caller should fall back to calling inkscape directly.
+    """
+
+    def __init__(self, program=None):
+        self.program = program or inkex.command.INKSCAPE_EXECUTABLE_NAME
+        self.process = None
+        self.broken = False  # inkscape couldn't be started in shell mode
+        self.stdout = None  # queue filled by the reader thread
+
+    def is_alive(self):
+        """check if the inkscape process is running"""
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        """start the inkscape process and wait for its first prompt"""
+        kwargs = {}
+        if sys.platform == "win32":
+            kwargs["creationflags"] = 0x08000000  # create no console window
+        try:
+            self.process = subprocess.Popen(
+                [inkex.command.which(self.program), "--shell"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,  # errors are reported by the standalone command
+                env={**os.environ, "SELF_CALL": "true"},
+                **kwargs,
+            )
+        except (OSError, inkex.command.CommandNotFound) as e:
+            self.broken = True
+            raise ShellError(str(e))
+        self.stdout = queue.Queue()
+        threading.Thread(target=_read, args=(self.process.stdout, self.stdout), daemon=True).start()
+        try:
+            self._answer(START_TIMEOUT)
+            self.ping()
+        except ShellError:
+            self.broken = True
+            self.stop()
+            raise
+
+    def stop(self):
+        """ask the inkscape process to quit, and kill it if it doesn't"""
+        if self.process is None:
+            return
+        process, self.process = self.process, None
+        try:
+            if process.poll() is None:
+                process.stdin.write(b"quit\n")
+                process.stdin.close()
+                process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+            process.wait()
+        finally:
+            process.stdin.close()
+            process.stdout.close()
+
+    def _answer(self, timeout):
+        """read inkscape's output until the next prompt"""
+        deadline = time.monotonic() + timeout
+        out = b""
+        while not (out == PROMPT.encode() or out.endswith(b"\n" + PROMPT.encode())):
+            try:
+                data = self.stdout.get(timeout=max(0, deadline - time.monotonic()))
+            except queue.Empty:
+                raise ShellError(f"no answer from inkscape after {timeout}s")
+            if data is None:
+                raise ShellError("inkscape process terminated unexpectedly")
+            out += data
+        return out[: -len(PROMPT)].decode(sys.stdout.encoding or "utf-8", errors="replace")
+
+    def command(self, actions, timeout=QUERY_TIMEOUT):
+        """send a list of actions to inkscape and return its answer"""
+        if not self.is_alive():
+            raise ShellError("inkscape process isn't running")
+        try:
+            self.process.stdin.write(";".join(actions).encode() + b"\n")
+            self.process.stdin.flush()
+        except OSError as e:
+            raise ShellError(str(e))
+        return self._answer(timeout)
+
+    def ping(self):
+        """health check: make sure inkscape answers to a trivial action"""
+        if not self.command(["inkscape-version"], timeout=START_TIMEOUT).strip():
+            raise ShellError("inkscape didn't answer to health check")
+
+    def run(self, actions, timeout=QUERY_TIMEOUT):
+        """send a list of actions to inkscape, (re)starting it if necessary
+        If the process crashes or doesn't answer in time, it is restarted and
+        the command is tried a second time."""
+        if self.broken:
+            raise ShellError("inkscape cannot be run in shell mode")
+        for attempt in range(2):
+            if not self.is_alive():
+                self.stop()
+                self.start()
+            try:
+                return self.command(actions, timeout=timeout)
+            except ShellError:
+                self.stop()
+                if attempt:
+                    raise
+
+
+_shell = None
+
+
+def get_shell():
+    """return the inkscape shell shared by the whole extension
+    It is stopped when the extension exits."""
+    global _shell
+    if _shell is None:
+        _shell = InkscapeShell()
+        atexit.register(_shell.stop)
+    return _shell
+
+
+def temporary_directory():
+    """return a temporary directory for the documents given to inkscape, to
+    be used in a `with` statement
+    It is created in memory (in TMPFS_DIR) when possible, so that writing
+    the document and reading it back doesn't touch the disk.
+    NOTE: sandboxed inkscape packages (snap) cannot write everywhere in
+    /dev/shm, so the usual temporary directory is used as a fallback."""
+    if os.path.isdir(TMPFS_DIR):
+        try:
+            return TemporaryDirectory(prefix="inkscape-command", dir=TMPFS_DIR)
+        except OSError:
+            pass
+    return TemporaryDirectory(prefix="inkscape-command")
+
+
+@contextmanager
+def temporary_file(name, parent=None):
+    """return the path of a temporary file for a document given to inkscape,
+    to be used in a `with` statement
+    The file is put in a temporary directory (see `temporary_directory`),
+    unless a parent directory is given: it is then a hidden file in that
+    directory (for example, next to the original document, so that relative
+    links still work)."""
+    if parent:
+        try:
+            fd, path = mkstemp(prefix=".", suffix="-" + name, dir=parent)
+        except OSError:
+            pass
+        else:
+            os.close(fd)
+            try:
+                yield path
+            finally:
+                os.remove(path)
+            return
+    with temporary_directory() as tmpdir:
+        yield os.path.join(tmpdir, name)
+
+
+def query_all(svg_file):
+    """return the output of "inkscape --query-all" on the given file"""
+    try:
+        return get_shell().run([f"file-open:{svg_file}", "query-all", "file-close"])
+    except ShellError:
+        return inkex.command.inkscape(svg_file, "--query-all")
+
+
+def _export_actions(export_file, export_type, extension=None):
+    """return the actions exporting the opened document to a file"""
+    actions = [f"export-filename:{export_file}", f"export-type:{export_type}"]
+    if extension:
+        actions.append(f"export-extension:{extension}")
+    actions.append("export-do")
+    return actions
+
+
+def _export_standalone(svg_file, export_file, export_type, extension=None):
+    """export the given file with a standalone inkscape command"""
+    args = [f"--export-filename={export_file}", f"--export-type={export_type}"]
+    if extension:
+        args.append(f"--export-extension={extension}")
+    inkex.command.inkscape(svg_file, *args)
+
+
+def export_all(svg_file, exports):
+    """export the given file to several formats with inkscape
+    The exports are given as tuples (export_file, export_type, extension) and
+    are all done in the same inkscape shell, so that the file is only opened
+    once. Each export has its own timeout. The exports that the shell didn't
+    produce are done again with standalone inkscape commands, which are run
+    concurrently. A ProgramRunError is raised if one of them fails."""
+    # NOTE: the export options are kept between exports, so the exports
+    # with an explicit output extension are done last
+    exports = sorted(exports, key=lambda e: e[2] is not None)
+    # NOTE: stale outputs are removed first, so that the exports the shell
+    # didn't produce are the missing files
+    for e in exports:
+        try:
+            os.remove(e[0])
+        except FileNotFoundError:
+            pass
+
+    shell = get_shell()
+    try:
+        shell.run([f"file-open:{svg_file}"])
+        # NOTE: the exports are not retried in a new shell, as the opened
+        # document would be lost, the missing ones are done afterward
+        for export_file, export_type, extension in exports:
+            shell.command(_export_actions(export_file, export_type, extension), timeout=EXPORT_TIMEOUT)
+        shell.command(["file-close"])
+    except ShellError:
+        shell.stop()
+    missing = [e for e in exports if not os.path.isfile(e[0])]
+    if not missing:
+        return
+    if len(missing) == 1:
+        _export_standalone(svg_file, *missing[0])
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+        futures = [executor.submit(_export_standalone, svg_file, *e) for e in missing]
+    for future in futures:
+        future.result()
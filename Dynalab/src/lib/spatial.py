@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+
+import math
+
+
+def _distance(x, y, box):
+    """distance between a point and a box (0 if the point is inside the box)"""
+    x0, y0, x1, y1 = box
+    dx = max(x0 - x, 0, x - x1)
+    dy = max(y0 - y, 0, y - y1)
+    return math.hypot(dx, dy)
+
+
+class SpatialIndex:
+    """2D spatial index over bounding boxes, implemented as a uniform grid
+    Each box is recorded in all the cells it covers, so that region queries
+    only look at the boxes of the cells covered by the region. The cell size
+    is chosen from the size of the boxes and the extent of the index, so
+    that the number of (non empty) cells is roughly proportional to the
+    number of boxes.
+    Boxes are given as inkex.BoundingBox, together with a key (typically an
+    element), and the queries return keys. Closed boxes are used: boxes that
+    only touch each other are overlapping.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.boxes = []  # boxes as tuples (x0, y0, x1, y1)
+        self.cells = {}  # list of box indices, indexed by cell coordinates
+        self.cell_size = None
+        self.extent = None  # cell coordinates of the top left and bottom right cells
+        self.built = False
+
+    def __len__(self):
+        return len(self.keys)
+
+    def build(self, boxes, cell_size=None):
+        """build the index from pairs (key, bounding box)
+        Empty bounding boxes are ignored."""
+        self.keys.clear()
+        self.boxes.clear()
+        self.cells.clear()
+        for key, bb in boxes:
+            if not bb:
+                continue
+            self.keys.append(key)
+            self.boxes.append((bb.left, bb.top, bb.right, bb.bottom))
+
+        if cell_size is None and self.boxes:
+            n = len(self.boxes)
+            width = max(b[2] for b in self.boxes) - min(b[0] for b in self.boxes)
+            height = max(b[3] for b in self.boxes) - min(b[1] for b in self.boxes)
+            mean_size = sum(max(b[2] - b[0], b[3] - b[1]) for b in self.boxes) / n
+            cell_size = max(mean_size, math.sqrt(width * height / n))
+        self.cell_size = cell_size or 1
+
+        for i, box in enumerate(self.boxes):
+            for cell in self._cells(box):
+                self.cells.setdefault(cell, []).append(i)
+        if self.cells:
+            self.extent = tuple(map(min, zip(*self.cells))) + tuple(map(max, zip(*self.cells)))
+        self.built = True
+        return self
+
+    def _cell(self, x, y):
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def _cells(self, box):
+        """iterates over the cells covered by a box"""
+        i0, j0 = self._cell(box[0], box[1])
+        i1, j1 = self._cell(box[2], box[3])
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                yield i, j
+
+    def query(self, bb):
+        """return the keys of the boxes that overlap the given region"""
+        if not bb or not self.boxes:
+            return []
+        x0, y0, x1, y1 = bb.left, bb.top, bb.right, bb.bottom
+        # NOTE: the region is clipped to the extent of the grid, so that
+        # huge regions don't look at many empty cells
+        ci0, cj0, ci1, cj1 = self.extent
+        i0, j0 = self._cell(x0, y0)
+        i1, j1 = self._cell(x1, y1)
+        found = set()
+        for i in range(max(i0, ci0), min(i1, ci1) + 1):
+            for j in range(max(j0, cj0), min(j1, cj1) + 1):
+                found.update(self.cells.get((i, j), ()))
+        boxes = self.boxes
+        return [
+            self.keys[k]
+            for k in sorted(found)
+            if boxes[k][0] <= x1 and x0 <= boxes[k][2] and boxes[k][1] <= y1 and y0 <= boxes[k][3]
+        ]
+
+    def nearest(self, x, y, k=1):
+        """return the keys of the `k` boxes nearest to the point (x, y), from
+        the nearest to the farthest
+        The distance is 0 for boxes containing the point. The cells are
+        looked at in rings of increasing size around the point, until the
+        nearest boxes found are closer than the next ring."""
+        if not self.boxes:
+            return []
+        ci0, cj0, ci1, cj1 = self.extent
+        i, j = self._cell(x, y)
+        # the rings that don't reach the grid are skipped
+        min_radius = max(0, ci0 - i, i - ci1, cj0 - j, j - cj1)
+        max_radius = max(abs(i - ci0), abs(i - ci1), abs(j - cj0), abs(j - cj1))
+
+        seen = set()
+        candidates = []  # pairs (distance, box index)
+        for r in range(min_radius, max_radius + 1):
+            for cell in self._ring(i, j, r):
+                for b in self.cells.get(cell, ()):
+                    if b not in seen:
+                        seen.add(b)
+                        candidates.append((_distance(x, y, self.boxes[b]), b))
+            candidates.sort()
+            del candidates[k:]
+            # boxes that were not seen yet are at least at distance
+            # r * cell_size from the point
+            if len(candidates) == k and candidates[-1][0] <= r * self.cell_size:
+                break
+        return [self.keys[b] for _, b in candidates]
+
+    @staticmethod
+    def _ring(i, j, r):
+        """iterates over the cells at "distance" r from cell (i, j)"""
+        if r == 0:
+            yield i, j
+            return
+        for d in range(-r, r + 1):
+            yield i + d, j - r
+            yield i + d, j + r
+        for d in range(-r + 1, r):
+            yield i - r, j + d
+            yield i + r, j + d
+
+    def overlapping_pairs(self):
+        """iterates over the pairs of keys whose boxes overlap
+        Each pair is only given once: two boxes are necessarily in the cell
+        containing the top left corner of their intersection, and the pair is
+        only considered in that cell."""
+        boxes = self.boxes
+        for cell, indices in self.cells.items():
+            for a in range(len(indices)):
+                ba = boxes[indices[a]]
+                for b in range(a + 1, len(indices)):
+                    bb = boxes[indices[b]]
+                    if ba[0] > bb[2] or bb[0] > ba[2] or ba[1] > bb[3] or bb[1] > ba[3]:
+                        continue
+                    if self._cell(max(ba[0], bb[0]), max(ba[1], bb[1])) == cell:
+                        yield self.keys[indices[a]], self.keys[indices[b]]
@@ -20,6 +20,26 @@ import inkex
 #
 
 
+# path commands, translated to upper case (see `path_topology`); numbers and
+# separators are removed
+_PATH_COMMANDS = str.maketrans("mzlhvcsqta", "MZLHVCSQTA", "0123456789+-.,eE \t\n\r\f")
+
+
+def path_topology(d):
+    """return the number of subpaths and the number of closed subpaths of a
+    path, given by its "d" attribute
+    Like for inkex.Path, a subpath starts with a "move" command and is closed
+    if its last command is a "close" command. Only the command letters are
+    looked at, which is much faster than parsing the path (`elem.path`) for
+    paths with many nodes."""
+    commands = d.translate(_PATH_COMMANDS)
+    subpaths = commands.count("M")
+    if commands and not commands.startswith("M"):
+        subpaths += 1  # commands before the first "move"
+    closed = commands.count("ZM") + commands.endswith("Z")
+    return subpaths, closed
+
+
 def is_path(elem, strict=False):
     if isinstance(elem, inkex.PathElement):
         return True
@@ -32,6 +52,11 @@ def is_path(elem, strict=False):
     return False
 
 
+def is_rounded(rect):
+    """return true if the rectangle has rounded corners"""
+    return any(rect.to_dimensionless(rect.get(r)) for r in ("rx", "ry") if rect.get(r) is not None)
+
+
 def bounding_box(elem, transform):
     if is_path(elem) or isinstance(elem, inkex.Image):
         return elem.bounding_box(transform=transform)
@@ -43,8 +68,33 @@ def bounding_box(elem, transform):
         return bounding_box(elem.href, transform @ elem.transform)
 
     if isinstance(elem, inkex.Group):  # also works for layers
-        # return elem.bounding_box(transform=transform)
-        return None
+        # the bounding box of a group is the union of the bounding boxes of
+        # its children, and cannot be computed if one of them cannot
+        transform = transform @ elem.transform
+        bb = inkex.BoundingBox()
+        for child in elem:
+            if not isinstance(child, inkex.ShapeElement):
+                continue
+            child_bb = bounding_box(child, transform)
+            if child_bb is None:
+                return None
+            bb += child_bb
+        return bb
+
+
+def has_bounding_box(elem):
+    """return true if the bounding box of the element can be computed by
+    `bounding_box`, without actually computing it"""
+    if is_path(elem) or isinstance(elem, inkex.Image):
+        return True
+
+    if isinstance(elem, inkex.Use):
+        return elem.href is not None and has_bounding_box(elem.href)
+
+    if isinstance(elem, inkex.Group):  # also works for layers
+        return all(has_bounding_box(child) for child in elem if isinstance(child, inkex.ShapeElement))
+
+    return False
 
 
 def effects(elem):
@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+
+"""run the Dynalab extensions on test files and record their performance
+
+Each extension is run headlessly in a separate python process, on the files
+from svg_testfiles and on generated documents (see generators.py). For each
+run, we record the wall time, the peak memory and the number of
+subprocesses started (external inkscape commands). The results are appended
+to a JSON history file, and compared with the previous results to detect
+regressions.
+
+usage: python benchmark/benchmark.py [--ext NAME ...] [--file PATTERN ...]
+"""
+
+import argparse
+import datetime
+import fnmatch
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.realpath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARK_DIR)
+SRC_DIR = os.path.join(ROOT_DIR, "Dynalab", "src")
+TESTFILES_DIR = os.path.join(ROOT_DIR, "svg_testfiles")
+HISTORY_FILE = os.path.join(BENCHMARK_DIR, "history.json")
+
+# extensions that are benchmarked: name => (module, class, additional arguments)
+EXTENSIONS = {
+    "MarkText": ("diagnostic_text", "MarkText", []),
+    "MarkImages": ("diagnostic_images", "MarkImages", []),
+    "MarkShapes": ("diagnostic_shapes", "MarkShapes", []),
+    "MarkClones": ("diagnostic_clones", "MarkClones", []),
+    "MarkEffects": ("diagnostic_effects", "MarkEffects", []),
+    "MarkGroups": ("diagnostic_groups", "MarkGroups", []),
+    "MarkTiny": ("diagnostic_tiny", "MarkTiny", []),
+    "MarkOutside": ("diagnostic_outside_page", "MarkOutside", []),
+    "MarkOpenPaths": ("diagnostic_open_paths", "MarkOpenPaths", []),
+    "MarkBlobs": ("diagnostic_blobs", "MarkBlobs", []),
+    "MarkDuplicates": ("diagnostic_duplicates", "MarkDuplicates", []),
+    "Battery": ("diagnostics", "Battery", []),
+    "BatteryObjects": ("diagnostics_objects", "Battery", []),
+    "Ungroups": ("action_ungroup", "Ungroups", []),
+    "CloseOpen": ("action_close_path", "CloseOpen", []),
+    "ChangeStyle": ("action_change_style", "ChangeStyle", []),
+    "MiscPalettes": ("misc_palettes", "MiscPalettes", []),
+    "Clean": ("misc_clean", "Clean", []),
+    "Export": ("export", "Export", ["--savedir={tmpdir}", "--filename=benchmark"]),
+}
+
+REGRESSION_THRESHOLD = 1.2  # a run is reported as a regression if it is 20% slower than before
+
+
+def run_child(module, cls, args, cache_file):
+    """run an extension in the current process and print the measurements as JSON
+    This is called (with --child) in a new python process for each run."""
+    import resource
+
+    sys.path.insert(0, SRC_DIR)
+    os.chdir(SRC_DIR)
+
+    # count the subprocesses started by the extension
+    subprocesses = [0]
+    Popen_init = subprocess.Popen.__init__
+
+    def counting_init(self, *a, **kw):
+        subprocesses[0] += 1
+        Popen_init(self, *a, **kw)
+
+    subprocess.Popen.__init__ = counting_init
+
+    # use a fresh bounding boxes cache
+    from lib import cache
+
+    cache.BB_CACHE_FILE = cache_file
+
+    ext = getattr(__import__(module), cls)()
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        ext.run(args, output=os.devnull)
+    except SystemExit as e:
+        if e.code:
+            status = "error"
+    run_time = 1000 * (time.perf_counter() - start)
+
+    print(
+        json.dumps(
+            {
+                "status": status,
+                "run_ms": run_time,
+                # NOTE: ru_maxrss is in kilobytes on linux, but in bytes on macos
+                "peak_memory_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                // (1024 if sys.platform == "darwin" else 1),
+                "subprocesses": subprocesses[0],
+                "counters": getattr(getattr(ext, "profiler", None), "counters", {}),
+            }
+        )
+    )
+
+
+def run(name, filename, tmpdir, verbose=False):
+    """run an extension on a file in a new python process, and return the measurements"""
+    module, cls, args = EXTENSIONS[name]
+    args = [a.format(tmpdir=tmpdir) for a in args] + [filename]
+    cache_file = os.path.join(tmpdir, "bb_cache.json")
+    if os.path.exists(cache_file):
+        os.remove(cache_file)
+    cmd = [sys.executable, __file__, "--child", module, cls, cache_file, "--", *args]
+    start = time.perf_counter()
+    p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=None if verbose else subprocess.DEVNULL, text=True)
+    wall_time = 1000 * (time.perf_counter() - start)
+    try:
+        result = json.loads(p.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        result = {"status": "crash"}
+    result["wall_ms"] = wall_time
+    return result
+
+
+def test_files(tmpdir, patterns):
+    """return the list of (name, filename) of test files matching one of the patterns
+    Generated documents are written to `tmpdir`."""
+    from generators import GENERATORS
+
+    files = []
+    for f in sorted(os.listdir(TESTFILES_DIR)):
+        if f.endswith(".svg"):
+            files.append((f, os.path.join(TESTFILES_DIR, f)))
+    for name, generator in GENERATORS.items():
+        files.append((name, os.path.join(tmpdir, name + ".svg")))
+
+    files = [(name, f) for name, f in files if any(fnmatch.fnmatch(name, p) for p in patterns)]
+    for name, f in files:
+        if name in GENERATORS:
+            with open(f, mode="wt") as out:
+                out.write(GENERATORS[name]())
+    return files
+
+
+def git_version():
+    try:
+        out = subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ROOT_DIR, capture_output=True, text=True)
+        return out.stdout.strip()
+    except OSError:
+        return None
+
+
+def load_history(filename):
+    try:
+        with open(filename, mode="rt") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def previous_results(history):
+    """index the most recent successful results by (extension, file)"""
+    previous = {}
+    for entry in history:
+        for r in entry["results"]:
+            if r.get("status") == "ok":
+                previous[(r["extension"], r["file"])] = r
+    return previous
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark the Dynalab extensions")
+    parser.add_argument("--ext", action="append", help="extensions to run (glob pattern, default: all)")
+    parser.add_argument("--file", action="append", help="test files to use (glob pattern, default: all)")
+    parser.add_argument("--repeat", type=int, default=1, help="number of runs (the best one is kept)")
+    parser.add_argument("--history", default=HISTORY_FILE, help="JSON history file")
+    parser.add_argument("--no-save", action="store_true", help="don't save the results in the history file")
+    parser.add_argument("--verbose", action="store_true", help="show the extensions' messages")
+    opts = parser.parse_args()
+
+    extensions = [e for e in EXTENSIONS if any(fnmatch.fnmatch(e, p) for p in opts.ext or ["*"])]
+    history = load_history(opts.history)
+    previous = previous_results(history)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="dynalab-benchmark") as tmpdir:
+        for file_name, filename in test_files(tmpdir, opts.file or ["*"]):
+            for ext in extensions:
+                runs = [run(ext, filename, tmpdir, verbose=opts.verbose) for _ in range(opts.repeat)]
+                r = min(runs, key=lambda r: r["wall_ms"])
+                r.update(extension=ext, file=file_name)
+                results.append(r)
+
+                line = f"{ext:15s} {file_name:25s} "
+                if r["status"] != "ok":
+                    line += r["status"]
+                else:
+                    line += f"{r['wall_ms']:8.0f}ms {r['peak_memory_kb'] / 1024:7.1f}MB"
+                    line += f" {r['subprocesses']:3d} subprocesses"
+                    prev = previous.get((ext, file_name))
+                    if prev and r["wall_ms"] > REGRESSION_THRESHOLD * prev["wall_ms"]:
+                        line += f"  REGRESSION (was {prev['wall_ms']:.0f}ms)"
+                print(line, flush=True)
+
+    if not opts.no_save:
+        history.append(
+            {
+                "date": datetime.datetime.now().isoformat(timespec="seconds"),
+                "version": git_version(),
+                "python": platform.python_version(),
+                "machine": platform.node(),
+                "results": results,
+            }
+        )
+        with open(opts.history, mode="wt") as f:
+            json.dump(history, f, indent=2)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        module, cls, cache_file, _, *args = sys.argv[2:]
+        run_child(module, cls, args, cache_file)
+    else:
+        main()
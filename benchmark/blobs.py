@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+
+"""measure the time taken by diagnostic_blobs.compute_blobs on many boxes
+
+Boxes are generated like in svg_testfiles/bb_blobs.svg (small objects
+forming clusters), plus a tall column of boxes, which was the worst case of
+the previous implementation.
+
+usage: python benchmark/blobs.py [--sizes 1000 10000 100000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.realpath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCHMARK_DIR), "Dynalab", "src")
+sys.path.insert(0, SRC_DIR)
+
+import inkex  # noqa: E402
+
+from diagnostic_blobs import compute_blobs  # noqa: E402
+
+
+def clusters(n, padding=1):
+    """`n` padded boxes forming clusters"""
+    rnd = random.Random(0)
+    size = 10 * n**0.5  # keep the density constant
+    centers = [(rnd.uniform(0, size), rnd.uniform(0, size)) for _ in range(max(1, n // 20))]
+    boxes = []
+    for k in range(n):
+        cx, cy = rnd.choice(centers)
+        x, y = rnd.gauss(cx, 5), rnd.gauss(cy, 5)
+        w, h = rnd.uniform(0.5, 3), rnd.uniform(0.5, 3)
+        bb = inkex.BoundingBox.new_xywh(x - padding, y - padding, w + 2 * padding, h + 2 * padding)
+        boxes.append((f"rect{k}", bb))
+    return boxes
+
+
+def column(n, padding=1):
+    """`n` padded boxes in a single column, every other one touching the next"""
+    boxes = []
+    for k in range(n):
+        y = 3 * k + (k % 2)
+        boxes.append((f"rect{k}", inkex.BoundingBox.new_xywh(-padding, y - padding, 2 + 2 * padding, 1 + 2 * padding)))
+    return boxes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark the computation of blobs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="numbers of boxes")
+    opts = parser.parse_args()
+
+    for name, generator in [("clusters", clusters), ("column", column)]:
+        for n in opts.sizes:
+            boxes = generator(n)
+            start = time.perf_counter()
+            blobs = compute_blobs(boxes)
+            t = time.perf_counter() - start
+            print(f"{name:10s} {n:8d} boxes {len(blobs):8d} blobs {1000 * t:8.0f}ms {1e6 * t / n:6.1f}µs/box")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+# Generators for synthetic SVG documents used by the benchmarks.
+# Each generator returns the content of an SVG document (as a string) and is
+# deterministic, so that timings can be compared between runs.
+
+import math
+import random
+
+HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink"
+     xmlns:inkscape="http://www.inkscape.org/namespaces/inkscape"
+     width="{size}mm" height="{size}mm" viewBox="0 0 {size} {size}">
+"""
+FOOTER = "</svg>\n"
+
+
+def deep_nesting(depth=300, width=3):
+    """groups nested `depth` times, each one with a transform and `width` small rectangles"""
+    rnd = random.Random(0)
+    lines = [HEADER.format(size=200)]
+    for d in range(depth):
+        angle = rnd.uniform(-1, 1)
+        lines.append(f'<g id="g{d}" transform="rotate({angle:.3f},100,100) translate(0.01,0.01)">')
+        for k in range(width):
+            x, y = rnd.uniform(20, 180), rnd.uniform(20, 180)
+            lines.append(f'<rect id="rect{d}_{k}" x="{x:.3f}" y="{y:.3f}" width="2" height="1" style="fill:#ff0000"/>')
+    lines.extend(["</g>"] * depth)
+    lines.append(FOOTER)
+    return "\n".join(lines)
+
+
+def huge_path(segments=50000):
+    """a single path with `segments` cubic Bézier segments (and a few open subpaths)"""
+    rnd = random.Random(0)
+    d = ["M 100,100"]
+    for k in range(segments):
+        if k % 10000 == 9999:
+            d.append(f"M {rnd.uniform(10, 190):.3f},{rnd.uniform(10, 190):.3f}")
+        r = 10 + 80 * k / segments
+        a = 0.05 * k
+        x, y = 100 + r * math.cos(a), 100 + r * math.sin(a)
+        d.append(f"C {x + 1:.3f},{y - 1:.3f} {x - 1:.3f},{y + 1:.3f} {x:.3f},{y:.3f}")
+    lines = [HEADER.format(size=200)]
+    lines.append(f'<path id="path0" d="{" ".join(d)}" style="fill:none;stroke:#000000;stroke-width:0.1"/>')
+    lines.append(FOOTER)
+    return "\n".join(lines)
+
+
+def many_clones(clones=2000):
+    """`clones` clones of a single path, with different transforms"""
+    rnd = random.Random(0)
+    lines = [HEADER.format(size=500)]
+    lines.append('<defs><path id="star" d="M 0,-5 L 1.5,-1.5 5,0 1.5,1.5 0,5 -1.5,1.5 -5,0 -1.5,-1.5 Z"/></defs>')
+    for k in range(clones):
+        x, y = rnd.uniform(0, 500), rnd.uniform(0, 500)
+        angle = rnd.uniform(0, 360)
+        lines.append(
+            f'<use id="use{k}" xlink:href="#star" transform="translate({x:.3f},{y:.3f}) rotate({angle:.1f})"/>'
+        )
+    lines.append(FOOTER)
+    return "\n".join(lines)
+
+
+def many_texts(texts=500):
+    """`texts` text elements (whose bounding boxes need the external inkscape command)"""
+    rnd = random.Random(0)
+    lines = [HEADER.format(size=500)]
+    for k in range(texts):
+        x, y = rnd.uniform(0, 480), rnd.uniform(10, 500)
+        lines.append(
+            f'<text id="text{k}" x="{x:.3f}" y="{y:.3f}" style="font-size:4px;font-family:sans-serif">text {k}</text>'
+        )
+    lines.append(FOOTER)
+    return "\n".join(lines)
+
+
+GENERATORS = {
+    "deep_nesting": deep_nesting,
+    "huge_path": huge_path,
+    "many_clones": many_clones,
+    "many_texts": many_texts,
+}
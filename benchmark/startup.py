@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+
+"""measure the start up time of the Dynalab extensions
+
+Each menu entry runs its extension in a new python interpreter, so the time
+spent importing modules and creating the extension is paid on every run.
+For each entry point (the scripts of Dynalab/src), a new python process
+measures the time needed to import inkex (which is needed by all extensions
+and is not counted), to import the script, and to create the extension
+object (reading the configuration, creating the argument parser, etc.).
+The run fails if the start up time of an entry point (without inkex) is
+over its budget.
+
+usage: python benchmark/startup.py [--repeat N] [--entry PATTERN ...]
+"""
+
+import argparse
+import compileall
+import fnmatch
+import json
+import os
+import re
+import subprocess
+import sys
+
+BENCHMARK_DIR = os.path.dirname(os.path.realpath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCHMARK_DIR), "Dynalab", "src")
+
+DEFAULT_BUDGET = 60  # ms
+# entry points with a different budget (in ms)
+BUDGETS = {
+    "about": 25,
+    "config_show": 25,
+    "config_default": 25,
+    "config_load": 25,
+    "config_save": 25,
+}
+
+CHILD = """
+import json, sys, time
+sys.path.insert(0, {src!r})
+start = time.perf_counter()
+import inkex
+inkex_time = time.perf_counter()
+import {module} as module
+import_time = time.perf_counter()
+if {cls!r}:
+    getattr(module, {cls!r})()
+create_time = time.perf_counter()
+print(json.dumps({{
+    "inkex_ms": 1000 * (inkex_time - start),
+    "import_ms": 1000 * (import_time - inkex_time),
+    "create_ms": 1000 * (create_time - import_time),
+}}))
+"""
+
+
+def entry_points():
+    """return the list of (module, class) of the entry points
+    The class is the one run in the `if __name__ == "__main__"` block (None
+    for scripts that don't run an extension)."""
+    entries = []
+    for f in sorted(os.listdir(SRC_DIR)):
+        if not f.endswith(".py"):
+            continue
+        with open(os.path.join(SRC_DIR, f), mode="rt") as src:
+            code = src.read()
+        if 'if __name__ == "__main__":' not in code:
+            continue
+        main = code.split('if __name__ == "__main__":')[-1]
+        m = re.search(r"(\w+)\(\)\.run\(\)", main)
+        entries.append((f[:-3], m.group(1) if m else None))
+    return entries
+
+
+def measure(module, cls):
+    """import an entry point in a new python process and return the measurements"""
+    code = CHILD.format(src=SRC_DIR, module=module, cls=cls)
+    p = subprocess.run([sys.executable, "-c", code], cwd=SRC_DIR, stdout=subprocess.PIPE, text=True)
+    try:
+        return json.loads(p.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="measure the start up time of the Dynalab extensions")
+    parser.add_argument("--entry", action="append", help="entry points to measure (glob pattern, default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="number of runs (the best one is kept)")
+    opts = parser.parse_args()
+
+    # the byte code is compiled beforehand, as it is for installed extensions
+    # after their first run
+    compileall.compile_dir(SRC_DIR, quiet=1)
+
+    over_budget = []
+    for module, cls in entry_points():
+        if not any(fnmatch.fnmatch(module, p) for p in opts.entry or ["*"]):
+            continue
+        runs = [r for r in (measure(module, cls) for _ in range(opts.repeat)) if r is not None]
+        if not runs:
+            print(f"{module:25s} crash", flush=True)
+            over_budget.append(module)
+            continue
+        r = min(runs, key=lambda r: r["import_ms"] + r["create_ms"])
+        total = r["import_ms"] + r["create_ms"]
+        budget = BUDGETS.get(module, DEFAULT_BUDGET)
+        line = f"{module:25s} import {r['import_ms']:6.1f}ms  create {r['create_ms']:6.1f}ms  "
+        line += f"total {total:6.1f}ms / {budget}ms  (inkex {r['inkex_ms']:.0f}ms)"
+        if total > budget:
+            line += "  OVER BUDGET"
+            over_budget.append(module)
+        print(line, flush=True)
+
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())